@@ -0,0 +1,276 @@
+import math
+import numpy as np
+from game_objects import Brick
+from layouts import create_layout
+
+# Constants
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+
+# Paddle and ball settings used by GameManager.init_game
+PADDLE_WIDTH = 100
+PADDLE_HEIGHT = 20
+PADDLE_SPEED = 8
+PADDLE_TOP = SCREEN_HEIGHT - 30
+BALL_RADIUS = 10
+BALL_SPEED = 5
+START_LIVES = 3
+
+# Movement limits of each player's half, as passed to Paddle.move
+PADDLE_BOUNDS = ((0, SCREEN_WIDTH//2 - 10), (SCREEN_WIDTH//2 + 10, SCREEN_WIDTH))
+SPAWN_X = (SCREEN_WIDTH//4, 3*SCREEN_WIDTH//4)
+
+class BatchEngine:
+    """
+    Steps many independent matches at once with NumPy.
+
+    Each match has two paddles, up to max_balls balls and its own copy of the
+    alive/hit state of one shared brick layout. The ball, paddle and brick
+    rules follow Ball.check_wall_collision, check_paddle_collision and
+    check_brick_collision, and balls are processed in the same order as the
+    GameManager ball list. Matches are not seed-compatible with GameManager:
+    directions come from a NumPy generator, powerups and lasers are not
+    simulated and a cleared brick field is refilled with the same layout,
+    so scores and lives differ from a GameManager match or replay.
+    """
+    def __init__(self, n_matches, layout=1, max_balls=8, seed=None):
+        self.n_matches = n_matches
+        self.max_balls = max_balls
+        self.layout = layout
+        self.rng = np.random.default_rng(seed)
+
+        # Shared brick layout
+        bricks = create_layout(layout, SCREEN_WIDTH, SCREEN_HEIGHT, Brick)
+        self.brick_left = np.array([b.rect.left for b in bricks], dtype=np.float64)
+        self.brick_top = np.array([b.rect.top for b in bricks], dtype=np.float64)
+        self.brick_right = np.array([b.rect.right for b in bricks], dtype=np.float64)
+        self.brick_bottom = np.array([b.rect.bottom for b in bricks], dtype=np.float64)
+        self.brick_points = np.array([b.points for b in bricks], dtype=np.int64)
+        self.brick_hits_to_break = np.array([b.hits_to_break for b in bricks], dtype=np.int64)
+        n_bricks = len(bricks)
+
+        # Per match state
+        shape = (n_matches, max_balls)
+        self.ball_x = np.zeros(shape)
+        self.ball_y = np.zeros(shape)
+        self.ball_vx = np.zeros(shape)
+        self.ball_vy = np.zeros(shape)
+        self.ball_active = np.zeros(shape, dtype=bool)
+        self.ball_attached = np.full(shape, -1, dtype=np.int8)  # Paddle index or -1
+        self.ball_offset = np.zeros(shape)
+
+        self.paddle_x = np.zeros((n_matches, 2), dtype=np.int64)
+        self.paddle_width = np.full((n_matches, 2), PADDLE_WIDTH, dtype=np.int64)
+
+        self.brick_alive = np.ones((n_matches, n_bricks), dtype=bool)
+        self.brick_hits = np.zeros((n_matches, n_bricks), dtype=np.int64)
+
+        self.scores = np.zeros((n_matches, 2), dtype=np.int64)
+        self.lives = np.zeros((n_matches, 2), dtype=np.int64)
+        self.game_over = np.zeros(n_matches, dtype=bool)
+        self.winner = np.zeros(n_matches, dtype=np.int8)
+        self.frames = np.zeros(n_matches, dtype=np.int64)
+
+        self.reset()
+
+    def reset(self, matches=None):
+        """Start new matches, either all of them or the given indices"""
+        if matches is None:
+            matches = np.arange(self.n_matches)
+        matches = np.asarray(matches)
+
+        self.ball_active[matches] = False
+        self.ball_attached[matches] = -1
+        self.paddle_x[matches] = (SCREEN_WIDTH//4 - 50, 3*SCREEN_WIDTH//4 - 50)
+        self.paddle_width[matches] = PADDLE_WIDTH
+        self.brick_alive[matches] = True
+        self.brick_hits[matches] = 0
+        self.scores[matches] = 0
+        self.lives[matches] = START_LIVES
+        self.game_over[matches] = False
+        self.winner[matches] = 0
+        self.frames[matches] = 0
+
+        for player in (0, 1):
+            self.spawn_ball(matches, player)
+
+    def spawn_ball(self, matches, player):
+        """Add a ball attached to the player's paddle, like a new life in GameManager"""
+        if len(matches) == 0:
+            return
+        free = ~self.ball_active[matches]
+        has_slot = free.any(axis=1)
+        matches = matches[has_slot]
+        slots = free[has_slot].argmax(axis=1)
+
+        self.ball_active[matches, slots] = True
+        self.ball_x[matches, slots] = SPAWN_X[player]
+        self.ball_y[matches, slots] = SCREEN_HEIGHT - 50
+        self.ball_vx[matches, slots] = self.rng.choice((-1.0, 1.0), size=len(matches)) * BALL_SPEED / 2
+        self.ball_vy[matches, slots] = -BALL_SPEED
+        self.ball_attached[matches, slots] = player
+        self.ball_offset[matches, slots] = self.paddle_width[matches, player] // 2
+
+    def step(self, inputs):
+        """
+        Advance every running match by one frame.
+        inputs is a bool array of shape (n_matches, 2, 3) holding the
+        (left, right, action) state of both players, as in GameManager.step.
+        """
+        inputs = np.asarray(inputs, dtype=bool)
+        running = ~self.game_over
+
+        # Action key releases the first ball attached to the player's paddle
+        for player in (0, 1):
+            attached = self.ball_attached == player
+            release = running & inputs[:, player, 2] & attached.any(axis=1)
+            rows = np.flatnonzero(release)
+            slots = attached[rows].argmax(axis=1)
+            self.ball_attached[rows, slots] = -1
+            self.ball_vy[rows, slots] = -np.abs(self.ball_vy[rows, slots])
+
+        # Paddle movement
+        for player, (bound_left, bound_right) in enumerate(PADDLE_BOUNDS):
+            x = self.paddle_x[:, player]
+            width = self.paddle_width[:, player]
+            for key, direction in ((0, -PADDLE_SPEED), (1, PADDLE_SPEED)):
+                moving = running & inputs[:, player, key]
+                x[moving] += direction
+                x[:] = np.where(moving & (x < bound_left), bound_left, x)
+                x[:] = np.where(moving & (x + width > bound_right), bound_right - width, x)
+
+        # Balls, in list order
+        lost = np.zeros_like(self.ball_active)
+        for slot in range(self.max_balls):
+            rows = np.flatnonzero(running & self.ball_active[:, slot])
+            if len(rows):
+                lost[rows, slot] = self.update_balls(rows, slot)
+
+        # Remove lost balls, keeping the remaining balls in order
+        if lost.any():
+            self.ball_active &= ~lost
+            order = np.argsort(~self.ball_active, axis=1, kind='stable')
+            for name in ('ball_x', 'ball_y', 'ball_vx', 'ball_vy', 'ball_active', 'ball_attached', 'ball_offset'):
+                setattr(self, name, np.take_along_axis(getattr(self, name), order, axis=1))
+
+        # A player with no balls left in their half loses a life
+        left_half = self.ball_x < SCREEN_WIDTH//2
+        has_balls = np.stack(
+            ((self.ball_active & left_half).any(axis=1), (self.ball_active & ~left_half).any(axis=1)),
+            axis=1
+        )
+        for player in (0, 1):
+            losing = running & ~has_balls[:, player] & (self.lives[:, player] > 0)
+            self.lives[losing, player] -= 1
+            self.spawn_ball(np.flatnonzero(losing & (self.lives[:, player] > 0)), player)
+
+        # Game over and winner, as in GameManager.update
+        p1_out = self.lives[:, 0] <= 0
+        p2_out = self.lives[:, 1] <= 0
+        ended = running & (p1_out | p2_out)
+        winner = np.where(p1_out & p2_out, np.where(self.scores[:, 0] > self.scores[:, 1], 1, 2), np.where(p1_out, 2, 1))
+        self.winner[ended] = winner[ended]
+        self.game_over |= ended
+
+        # Refill cleared brick fields
+        cleared = running & ~self.brick_alive.any(axis=1)
+        self.brick_alive[cleared] = True
+        self.brick_hits[cleared] = 0
+
+        self.frames[running] += 1
+
+    def update_balls(self, rows, slot):
+        """Move and collide one ball slot of the given matches, returns the lost mask"""
+        x = self.ball_x[rows, slot]
+        y = self.ball_y[rows, slot]
+        vx = self.ball_vx[rows, slot]
+        vy = self.ball_vy[rows, slot]
+        attached = self.ball_attached[rows, slot]
+        r = BALL_RADIUS
+
+        # Ball.update
+        is_attached = attached >= 0
+        free = ~is_attached
+        x[free] += vx[free]
+        y[free] += vy[free]
+        if is_attached.any():
+            paddle = self.paddle_x[rows[is_attached], attached[is_attached]]
+            x[is_attached] = paddle + self.ball_offset[rows[is_attached], slot]
+            y[is_attached] = PADDLE_TOP - r
+
+        # Ball.check_wall_collision
+        hit_left = x - r < 0
+        hit_right = ~hit_left & (x + r > SCREEN_WIDTH)
+        x[hit_left] = r
+        vx[hit_left] = np.abs(vx[hit_left])
+        x[hit_right] = SCREEN_WIDTH - r
+        vx[hit_right] = -np.abs(vx[hit_right])
+        hit_top = y - r < 0
+        y[hit_top] = r
+        vy[hit_top] = np.abs(vy[hit_top])
+        lost = y + r > SCREEN_HEIGHT
+        alive = ~lost
+
+        # Ball.check_paddle_collision, first paddle hit wins
+        bounced = np.zeros(len(rows), dtype=bool)
+        for player in (0, 1):
+            left = self.paddle_x[rows, player]
+            width = self.paddle_width[rows, player]
+            hit = (alive & ~bounced & (attached != player) &
+                   (y + r >= PADDLE_TOP) & (y - r <= PADDLE_TOP + PADDLE_HEIGHT) &
+                   (x + r >= left) & (x - r <= left + width))
+            if hit.any():
+                relative_intersect_x = ((left[hit] + width[hit] // 2) - x[hit]) / (width[hit] / 2)
+                bounce_angle = relative_intersect_x * (math.pi / 3)
+                speed = np.sqrt(vx[hit]**2 + vy[hit]**2)
+                vx[hit] = -speed * np.sin(bounce_angle)
+                vy[hit] = -speed * np.cos(bounce_angle)
+                y[hit] = PADDLE_TOP - r
+                bounced |= hit
+
+        # Ball.check_brick_collision, first brick in layout order wins
+        check = np.flatnonzero(alive)
+        if len(check):
+            bx = x[check, None]
+            by = y[check, None]
+            distance_x = bx - np.maximum(self.brick_left, np.minimum(bx, self.brick_right))
+            distance_y = by - np.maximum(self.brick_top, np.minimum(by, self.brick_bottom))
+            touching = np.sqrt(distance_x**2 + distance_y**2) < r
+            touching &= self.brick_alive[rows[check]]
+            hit_any = touching.any(axis=1)
+            if hit_any.any():
+                check = check[hit_any]
+                brick = touching[hit_any].argmax(axis=1)
+                distance_x = distance_x[hit_any, brick]
+                distance_y = distance_y[hit_any, brick]
+                flip_x = np.abs(distance_x) > np.abs(distance_y)
+                vx[check[flip_x]] = -vx[check[flip_x]]
+                vy[check[~flip_x]] = -vy[check[~flip_x]]
+
+                # Brick.hit, score goes to the player whose half the ball is in
+                matches = rows[check]
+                self.brick_hits[matches, brick] += 1
+                destroyed = self.brick_hits[matches, brick] >= self.brick_hits_to_break[brick]
+                self.brick_alive[matches[destroyed], brick[destroyed]] = False
+                player = (x[check] >= SCREEN_WIDTH//2).astype(np.int64)
+                np.add.at(self.scores, (matches[destroyed], player[destroyed]), self.brick_points[brick[destroyed]])
+
+        self.ball_x[rows, slot] = x
+        self.ball_y[rows, slot] = y
+        self.ball_vx[rows, slot] = vx
+        self.ball_vy[rows, slot] = vy
+        return lost
+
+    def run(self, controller, n_frames):
+        """
+        Step all matches for up to n_frames. controller(engine) must return the
+        inputs array for the next frame. Returns the number of match-frames simulated.
+        """
+        total = 0
+        for _ in range(n_frames):
+            running = int((~self.game_over).sum())
+            if running == 0:
+                break
+            self.step(controller(self))
+            total += running
+        return total
@@ -0,0 +1,291 @@
+import os
+
+# Run without a window or sound card
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import pygame
+from game_objects import Ball, Brick, PowerUp, Laser
+from game_manager import GameManager
+from rendering import DirtyRectRenderer
+from ui import Menu
+from fonts import get_font
+
+# Constants
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+PADDLE_WIDTH = 100
+
+# Power-up types
+MULTIBALL = 0
+EXPAND = 4
+
+LASERS_PER_FRAME = 16  # About 1000 lasers in flight
+POWERUPS_PER_FRAME = 4  # About 1000 powerups falling
+MAX_POWERUPS = 1000
+
+# Both players launch the ball (or fire) every frame
+LAUNCH = ((False, False, True), (False, False, True))
+
+# Benchmark scenarios.
+# Each setup function returns (prepare, run). prepare() puts the game into the
+# scenario's state before every frame and is not timed, run() is the timed frame.
+
+def make_game(layout=1, screen=None, seed=0, swept_collisions=False):
+    if screen is None:
+        game = GameManager(headless=True, seed=seed, swept_collisions=swept_collisions)
+    else:
+        game = GameManager(screen, seed=seed, renderer=DirtyRectRenderer())
+    if layout != game.current_layout:
+        game.load_layout(layout)
+    game.step(LAUNCH)
+    return game
+
+def hold(game, balls=None):
+    """Keep the game running and the stress level constant between frames"""
+    for player in game.players:
+        player.lives = 3  # draw_game_ui draws one circle per life, keep it small
+        center = player.paddle.rect.centerx
+        player.paddle.rect.width = PADDLE_WIDTH
+        player.paddle.rect.centerx = center
+    if balls is not None:
+        # Top up with MULTIBALL, two balls per powerup, then trim
+        while len(game.balls) < balls:
+            game.apply_powerup(PowerUp(0, 0, MULTIBALL), game.players[len(game.balls) % 2])
+        del game.balls[balls:]
+
+def layout_scenario(layout):
+    def setup():
+        game = make_game(layout)
+        def prepare():
+            hold(game, balls=2)
+        return prepare, lambda: game.step(LAUNCH)
+    return setup
+
+def balls_scenario(n_balls, swept_collisions=False, dt=1):
+    def setup():
+        game = make_game(swept_collisions=swept_collisions)
+        def prepare():
+            hold(game, balls=n_balls)
+        return prepare, lambda: game.step(LAUNCH, dt=dt)
+    return setup
+
+def laser_storm():
+    game = make_game()
+    for player in game.players:
+        player.paddle.laser_active = True
+    spacing = SCREEN_WIDTH // LASERS_PER_FRAME
+    def prepare():
+        hold(game, balls=2)
+        for i in range(LASERS_PER_FRAME):
+            game.lasers.append(Laser(spacing // 2 + i * spacing, SCREEN_HEIGHT - 30))
+    return prepare, lambda: game.step(LAUNCH)
+
+def powerup_rain():
+    game = make_game()
+    rng = random.Random(0)
+    def prepare():
+        hold(game, balls=10)
+        for _ in range(POWERUPS_PER_FRAME):
+            if len(game.powerups) < MAX_POWERUPS:
+                game.powerups.append(PowerUp(rng.randrange(SCREEN_WIDTH), 60, rng.randint(0, EXPAND)))
+    return prepare, lambda: game.step(LAUNCH)
+
+def draw_scenario(n_balls):
+    def setup():
+        game = make_game(screen=pygame.display.get_surface())
+        def prepare():
+            hold(game, balls=n_balls)
+            game.step(LAUNCH)
+        def run():
+            game.draw()
+            game.renderer.present()
+        return prepare, run
+    return setup
+
+def reset_scenario():
+    """Start button to first frame: a new match on the same GameManager, one tick and a full draw"""
+    game = make_game(screen=pygame.display.get_surface())
+    def run():
+        game.reset(0)
+        game.step(LAUNCH)
+        game.draw()
+        game.renderer.present()
+    return (lambda: None), run
+
+def snapshot_scenario(restore):
+    """Rollback cost on the 120-brick layout: a snapshot every frame, or restoring one"""
+    def setup():
+        game = make_game(layout=5)
+        for _ in range(30):
+            game.step(LAUNCH)
+        state = game.save_state()
+        if restore:
+            return (lambda: None), lambda: game.load_state(state)
+        return (lambda: game.step(LAUNCH)), game.save_state
+    return setup
+
+def menu_scenario(name):
+    def setup():
+        screen = pygame.display.get_surface()
+        font = get_font('Arial', 24)
+        large_font = get_font('Arial', 36)
+        renderer = DirtyRectRenderer()
+        menu = Menu(screen, font, large_font, renderer)
+        draw = {
+            'main': lambda pos: menu.draw_main_menu(pos, [500, 400, 300, 200, 100]),
+            'settings': lambda pos: menu.draw_settings_menu(pos, True, True),
+            'game_over': lambda pos: menu.draw_game_over(pos, 1, [120, 80]),
+            'pause': menu.draw_pause_menu,
+        }[name]
+        # The mouse sweeps down the middle of the screen across the buttons
+        path = [(SCREEN_WIDTH // 2, y) for y in range(180, 500, 4)]
+        frame = [0]
+        def run():
+            pos = path[frame[0] % len(path)]
+            frame[0] += 1
+            menu.handle_mouse_motion(pos)
+            draw(pos)
+            renderer.present()
+        return (lambda: None), run
+    return setup
+
+SCENARIOS = {}
+for layout in range(1, 6):
+    SCENARIOS[f'update.layout{layout}'] = layout_scenario(layout)
+for n_balls in (1, 10, 100, 1000):
+    SCENARIOS[f'update.balls{n_balls}'] = balls_scenario(n_balls)
+for n_balls in (10, 100):
+    SCENARIOS[f'update.swept_balls{n_balls}'] = balls_scenario(n_balls, swept_collisions=True)
+    SCENARIOS[f'update.swept_dt4_balls{n_balls}'] = balls_scenario(n_balls, swept_collisions=True, dt=4)
+SCENARIOS['update.laser_storm'] = laser_storm
+SCENARIOS['update.powerup_rain'] = powerup_rain
+SCENARIOS['draw.balls10'] = draw_scenario(10)
+SCENARIOS['draw.balls100'] = draw_scenario(100)
+SCENARIOS['match.reset'] = reset_scenario
+SCENARIOS['snapshot.take'] = snapshot_scenario(restore=False)
+SCENARIOS['snapshot.restore'] = snapshot_scenario(restore=True)
+for name in ('main', 'settings', 'game_over', 'pause'):
+    SCENARIOS[f'menu.{name}'] = menu_scenario(name)
+
+def run_scenario(setup, frames=300, warmup=30):
+    """Time frames of one scenario, returns fps and frame time percentiles in ms"""
+    prepare, run = setup()
+    for _ in range(warmup):
+        prepare()
+        run()
+
+    times = []
+    for _ in range(frames):
+        prepare()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    times.sort()
+    def percentile(point):
+        return round(times[min(frames - 1, frames * point // 100)] * 1000, 4)
+    return {
+        'fps': round(frames / sum(times), 1),
+        'ms_p50': percentile(50),
+        'ms_p95': percentile(95),
+        'ms_p99': percentile(99),
+        'frames': frames,
+    }
+
+def run_benchmarks(names=None, frames=300, warmup=30):
+    """Run the named scenarios (all by default) and return the results document"""
+    pygame.init()
+    pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    results = {}
+    for name, setup in SCENARIOS.items():
+        if names and not any(name.startswith(prefix) for prefix in names):
+            continue
+        results[name] = run_scenario(setup, frames, warmup)
+        print(f"{name:<24}{results[name]['fps']:>12.1f} fps{results[name]['ms_p95']:>10.3f} ms p95")
+
+    return {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'scenarios': results,
+    }
+
+def entity_memory(count=10000):
+    """Bytes allocated per Ball, PowerUp, Laser and Brick, including their Vector2 and Rect"""
+    factories = {
+        'Ball': lambda i: Ball(i % SCREEN_WIDTH, 300),
+        'PowerUp': lambda i: PowerUp(i % SCREEN_WIDTH, 300, i % (EXPAND + 1)),
+        'Laser': lambda i: Laser(i % SCREEN_WIDTH, 300),
+        'Brick': lambda i: Brick(i % SCREEN_WIDTH, 100),
+    }
+    sizes = {}
+    for name, factory in factories.items():
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        entities = [factory(i) for i in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        # Leave out the list holding the entities
+        sizes[name] = round((after - before - sys.getsizeof(entities)) / count, 1)
+        del entities
+    return sizes
+
+def compare(results, baseline, threshold=0.1):
+    """
+    Compare fps and bytes per entity against a baseline results document.
+    Returns (name, baseline value, value, unit) for every scenario that got
+    slower and every entity that got bigger by more than threshold (a
+    fraction). Entries missing from either side are skipped.
+    """
+    regressions = []
+    for name, result in results['scenarios'].items():
+        base = baseline['scenarios'].get(name)
+        if base is not None and result['fps'] < base['fps'] * (1 - threshold):
+            regressions.append((name, base['fps'], result['fps'], 'fps'))
+    base_sizes = baseline.get('bytes_per_entity', {})
+    for name, size in results.get('bytes_per_entity', {}).items():
+        base = base_sizes.get(name)
+        if base is not None and size > base * (1 + threshold):
+            regressions.append((name, base, size, 'bytes'))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the game update, draw and menu hot paths")
+    parser.add_argument('scenarios', nargs='*', help="scenario name prefixes to run (default: all)")
+    parser.add_argument('--frames', type=int, default=300, help="timed frames per scenario")
+    parser.add_argument('--warmup', type=int, default=30, help="untimed frames before timing")
+    parser.add_argument('--out', default='benchmark.json', help="JSON file for the results")
+    parser.add_argument('--baseline', metavar='PATH', help="results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.1, help="allowed fps drop or memory growth against the baseline")
+    parser.add_argument('--list', action='store_true', help="list the scenarios and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(SCENARIOS))
+        sys.exit()
+
+    results = run_benchmarks(args.scenarios, args.frames, args.warmup)
+    results['bytes_per_entity'] = entity_memory()
+    for name, size in results['bytes_per_entity'].items():
+        print(f"{name:<24}{size:>12.1f} bytes")
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, base_value, value, unit in regressions:
+            print(f"REGRESSION {name}: {base_value:.1f} -> {value:.1f} {unit} ({value / base_value - 1:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions over {args.threshold:.0%} against {args.baseline}")
@@ -0,0 +1,100 @@
+import math
+
+def sweep_circle_rect(x, y, dx, dy, radius, rect):
+    """
+    Earliest time of impact of a circle moving from (x, y) by (dx, dy) with a rect.
+    Returns (t, nx, ny) with t in [0, 1] and the unit contact normal pointing
+    from the rect towards the circle, or None if they do not touch. Contacts
+    where the circle is already moving away from the rect are ignored, so a
+    ball that has just bounced is not caught by the same surface again.
+    """
+    left, top, right, bottom = rect.left, rect.top, rect.right, rect.bottom
+
+    # Already touching at the start of the move
+    closest_x = max(left, min(x, right))
+    closest_y = max(top, min(y, bottom))
+    offset_x = x - closest_x
+    offset_y = y - closest_y
+    distance_sq = offset_x * offset_x + offset_y * offset_y
+    if distance_sq < radius * radius:
+        if distance_sq > 0:
+            distance = math.sqrt(distance_sq)
+            nx, ny = offset_x / distance, offset_y / distance
+        else:
+            # Centre inside the rect, push out through the nearest side
+            nx, ny = min(((-1, 0, x - left), (1, 0, right - x), (0, -1, y - top), (0, 1, bottom - y)),
+                         key=lambda side: side[2])[:2]
+        if nx * dx + ny * dy < 0:
+            return (0.0, nx, ny)
+        return None
+    if dx == 0 and dy == 0:
+        return None
+
+    # Ray against the rect grown by the radius on every side
+    t_enter = -math.inf
+    t_exit = math.inf
+    normal = (0, 0)
+    for position, delta, low, high, axis_normal in (
+        (x, dx, left - radius, right + radius, (1, 0)),
+        (y, dy, top - radius, bottom + radius, (0, 1)),
+    ):
+        if delta == 0:
+            if position < low or position > high:
+                return None
+            continue
+        t_near = (low - position) / delta
+        t_far = (high - position) / delta
+        side = -1
+        if t_near > t_far:
+            t_near, t_far = t_far, t_near
+            side = 1
+        if t_near > t_enter:
+            t_enter = t_near
+            normal = (axis_normal[0] * side, axis_normal[1] * side)
+        t_exit = min(t_exit, t_far)
+    if t_enter > t_exit or t_enter > 1 or t_exit <= 0:
+        return None
+
+    # Entering a corner of the grown rect, the real shape there is a circle around the corner
+    t = max(t_enter, 0.0)
+    hit_x = x + dx * t
+    hit_y = y + dy * t
+    if (hit_x < left or hit_x > right) and (hit_y < top or hit_y > bottom):
+        corner_x = left if hit_x < left else right
+        corner_y = top if hit_y < top else bottom
+        to_x = x - corner_x
+        to_y = y - corner_y
+        a = dx * dx + dy * dy
+        b = 2 * (to_x * dx + to_y * dy)
+        c = to_x * to_x + to_y * to_y - radius * radius
+        discriminant = b * b - 4 * a * c
+        if discriminant < 0:
+            return None
+        t = (-b - math.sqrt(discriminant)) / (2 * a)
+        if t < 0 or t > 1:
+            return None
+        normal = ((x + dx * t - corner_x) / radius, (y + dy * t - corner_y) / radius)
+
+    if normal[0] * dx + normal[1] * dy >= 0:
+        return None
+    return (t, normal[0], normal[1])
+
+def sweep_circle_walls(x, y, dx, dy, radius, left, right, top):
+    """
+    Earliest time of impact of a moving circle with the left, right and top walls.
+    Returns (t, nx, ny) like sweep_circle_rect, or None. The bottom is open.
+    """
+    best = None
+    if dx < 0:
+        t = max(0.0, (left + radius - x) / dx)
+        if t <= 1:
+            best = (t, 1, 0)
+    elif dx > 0:
+        t = max(0.0, (right - radius - x) / dx)
+        if t <= 1:
+            best = (t, -1, 0)
+    if dy < 0:
+        t = max(0.0, (top + radius - y) / dy)
+        if t <= 1 and (best is None or t < best[0]):
+            best = (t, 0, 1)
+    return best
@@ -0,0 +1,61 @@
+from itertools import compress
+
+class EntityList(list):
+    """
+    List of balls, powerups or lasers with deferred removal.
+    While iterating, kill(i) marks an entity as dead instead of popping it.
+    compact() then drops the dead entities once at the end of the phase and
+    keeps the survivors in order. A wave of deaths is removed in a single
+    pass, so losing 1000 balls at once does not cost 1000 pops.
+    """
+    FEW = 8  # Up to this many deaths, deleting each one is cheaper than a full pass
+
+    def __init__(self, entities=()):
+        super().__init__(entities)
+        self.dead = []
+
+    def kill(self, index):
+        self.dead.append(index)
+
+    def compact(self):
+        dead = self.dead
+        if not dead:
+            return
+        if len(dead) <= self.FEW:
+            for index in sorted(set(dead), reverse=True):
+                del self[index]
+        else:
+            keep = bytearray(b'\x01') * len(self)
+            for index in dead:
+                keep[index] = 0
+            self[:] = compress(self, keep)
+        self.dead = []
+
+class BrickList(list):
+    """
+    List of bricks with O(1) removal.
+    A removed brick's slot is filled with the last brick, so the list does not
+    keep the layout order. BrickGrid remembers that order for collision queries.
+    Only append() and remove() keep the position index up to date, the other
+    list mutations raise TypeError; build a new BrickList to replace the bricks.
+    """
+    def __init__(self, bricks=()):
+        super().__init__(bricks)
+        self.index = {brick: i for i, brick in enumerate(self)}
+
+    def append(self, brick):
+        self.index[brick] = len(self)
+        super().append(brick)
+
+    def remove(self, brick):
+        i = self.index.pop(brick)
+        last = super().pop()
+        if last is not brick:
+            super().__setitem__(i, last)
+            self.index[last] = i
+
+    def unsupported(self, *args, **kwargs):
+        raise TypeError("BrickList only supports append() and remove(), build a new BrickList instead")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = unsupported
+    clear = extend = insert = pop = sort = reverse = unsupported
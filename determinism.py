@@ -0,0 +1,164 @@
+import os
+
+# Run without a window or sound card
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+from game_manager import GameManager
+from replay import ReplayRecorder, load_replay, decode_frame, play_replay
+from tournament import CONTROLLERS
+
+# Golden replays: recorded matches with the state each one must end in.
+# The headless engine, replays, tournaments and netplay all rely on a match
+# playing out exactly the same from its seed and inputs; this catches any
+# change to the simulation that breaks that.
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'replays', 'golden.json')
+MATCHES = [
+    # Seed, player 1 controller, player 2 controller
+    (1, 'tracker', 'random'),
+    (2, 'tracker', 'lazy_tracker'),
+    (3, 'random', 'random'),
+    (4, 'lazy_tracker', 'tracker'),
+    (5, 'tracker', 'tracker'),
+]
+MAX_FRAMES = 6000
+TRACE_EVERY = 300  # Frames between entries of the score trace
+SNAPSHOT_FRAME = 500  # Frame a snapshot is taken and restored into a new GameManager
+
+def state_digest(game):
+    """Hash of the simulation state, bricks in layout order so the brick list order does not matter"""
+    bricks = sorted(game.bricks, key=game.brick_grid.order.__getitem__)
+    state = (
+        game.frame, game.current_layout, game.game_over, game.winner,
+        [(player.score, player.lives, tuple(player.paddle.rect), player.paddle.sticky,
+          player.paddle.laser_active, player.paddle.laser_cooldown) for player in game.players],
+        [(ball.pos.x, ball.pos.y, ball.velocity.x, ball.velocity.y) for ball in game.balls],
+        [(tuple(brick.rect), brick.hits) for brick in bricks],
+        [(powerup.pos.x, powerup.pos.y, powerup.type) for powerup in game.powerups],
+        [tuple(laser.rect) for laser in game.lasers],
+        game.rng.getstate(),
+    )
+    return hashlib.sha256(repr(state).encode()).hexdigest()
+
+def record_match(seed, controller1, controller2, max_frames=MAX_FRAMES):
+    """Play a match with scripted controllers, returns the replay bytes"""
+    game = GameManager(headless=True, seed=seed)
+    recorder = ReplayRecorder(seed)
+    controllers = (CONTROLLERS[controller1], CONTROLLERS[controller2])
+    rngs = (random.Random(seed * 2 + 1), random.Random(seed * 2 + 2))
+    while not game.game_over and recorder.frames < max_frames:
+        inputs = tuple(controller(game, player, rng)
+                       for controller, player, rng in zip(controllers, game.players, rngs))
+        recorder.record(inputs)
+        game.step(inputs)
+    return recorder.to_bytes()
+
+def frame_inputs(data):
+    """(inputs, paused) of every recorded frame"""
+    _, _, runs = load_replay(data)
+    for state, count in runs:
+        frame = decode_frame(state)
+        for _ in range(count):
+            yield frame
+
+def trace_match(data):
+    """
+    Replay a match frame by frame, returns the score trace, the digest at
+    SNAPSHOT_FRAME and the final digest after restoring that frame's
+    snapshot into a new GameManager and playing on from there
+    """
+    seed = load_replay(data)[0]
+    game = GameManager(headless=True, seed=seed)
+    trace = []
+    digest = None
+    for frame, (inputs, paused) in enumerate(frame_inputs(data)):
+        if frame % TRACE_EVERY == 0:
+            trace.append([frame] + [[player.score, player.lives] for player in game.players])
+        if frame == SNAPSHOT_FRAME:
+            digest = state_digest(game)
+            restored = GameManager(headless=True, seed=seed + 1)
+            restored.load_state(game.save_state())
+            game = restored
+        game.paused = paused
+        game.step(inputs)
+    return trace, digest, state_digest(game)
+
+def expected_results(data):
+    game = play_replay(data)
+    trace, snapshot_digest, restored_digest = trace_match(data)
+    return {
+        'frame': game.frame,
+        'scores': [player.score for player in game.players],
+        'lives': [player.lives for player in game.players],
+        'winner': game.winner,
+        'digest': state_digest(game),
+        'trace': trace,
+        'snapshot_digest': snapshot_digest,
+        'restored_digest': restored_digest,
+    }
+
+def check(path=GOLDEN_PATH):
+    """Replay every golden match, returns a list of problems, empty if all match"""
+    with open(path) as f:
+        golden = json.load(f)
+    problems = []
+    for match in golden['matches']:
+        data = bytes.fromhex(match['replay'])
+        expected = match['expected']
+        game = play_replay(data)
+        name = f"seed {match['seed']} ({' vs '.join(match['players'])})"
+        if state_digest(game) != expected['digest']:
+            problems.append(f"{name}: ends in a different state, frame {game.frame} "
+                            f"scores {[player.score for player in game.players]}, expected frame "
+                            f"{expected['frame']} scores {expected['scores']}")
+            continue
+        trace, snapshot_digest, restored_digest = trace_match(data)
+        if trace != expected['trace']:
+            problems.append(f"{name}: score trace differs when replayed frame by frame")
+        if snapshot_digest != expected['snapshot_digest']:
+            problems.append(f"{name}: frame {SNAPSHOT_FRAME} differs when replayed frame by frame")
+        if restored_digest != expected['digest']:
+            problems.append(f"{name}: playing on from a restored snapshot ends in a different state")
+    return problems
+
+def update(path=GOLDEN_PATH):
+    """Record the golden matches again and save what they end in, only after an intended change"""
+    matches = []
+    for seed, controller1, controller2 in MATCHES:
+        data = record_match(seed, controller1, controller2)
+        matches.append({
+            'seed': seed,
+            'players': [controller1, controller2],
+            'replay': data.hex(),
+            'expected': expected_results(data),
+        })
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'matches': matches}, f, indent=1)
+        f.write('\n')
+    return matches
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that recorded matches still play out exactly the same")
+    parser.add_argument('--update', action='store_true',
+                        help="record the golden matches again, only after an intended change to the simulation")
+    parser.add_argument('--golden', default=GOLDEN_PATH, help="golden replay file")
+    args = parser.parse_args()
+
+    if args.update:
+        for match in update(args.golden):
+            expected = match['expected']
+            print(f"seed {match['seed']}: {expected['frame']} frames, scores {expected['scores']}")
+        sys.exit()
+
+    problems = check(args.golden)
+    for problem in problems:
+        print(problem)
+    if problems:
+        sys.exit(1)
+    print("All golden matches replay identically")
@@ -0,0 +1,62 @@
+import json
+import os
+import pygame
+
+CACHE_PATH = 'data/font_cache.json'  # Font name -> font file, null for pygame's default font
+
+class FontCache:
+    """
+    Fonts by name and size, each created once per process.
+    Looking a system font up by name makes pygame scan every installed font
+    (running fc-list on Linux), so the file it resolves to is saved and
+    later launches open that file directly. Delete the cache file to look
+    the fonts up again, e.g. after installing a font.
+    """
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.paths = None  # Loaded on first use
+        self.fonts = {}
+
+    def load_paths(self):
+        try:
+            with open(self.path) as f:
+                self.paths = json.load(f)
+        except (OSError, ValueError):
+            self.paths = {}
+
+    def save_paths(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump(self.paths, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError:
+            pass  # Read-only install, look the font up again next time
+
+    def resolve(self, name):
+        """File of a system font, or None for pygame's default font like SysFont"""
+        if self.paths is None:
+            self.load_paths()
+        if name in self.paths:
+            path = self.paths[name]
+            if path is None or os.path.exists(path):
+                return path
+        path = pygame.font.match_font(name)
+        self.paths[name] = path
+        self.save_paths()
+        return path
+
+    def get(self, name, size):
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.Font(self.resolve(name), size)
+            self.fonts[key] = font
+        return font
+
+font_cache = FontCache()
+
+def get_font(name, size):
+    """Shared Font for a system font name and size, a cached stand-in for pygame.font.SysFont"""
+    return font_cache.get(name, size)
@@ -1,16 +1,28 @@
 import pygame
 import random
-import os
+from datetime import datetime, timezone
 from pygame.locals import *
 from game_objects import Player, Paddle, Ball, Brick, PowerUp, Laser
+from collision import sweep_circle_rect, sweep_circle_walls
 from layouts import create_layout
+from levels import level_cache, build_bricks, LEVEL_COUNT
+from level_generator import endless_level
+from spatial_grid import BrickGrid
+import snapshot
+from containers import EntityList, BrickList
+from rendering import BrickLayer, DirtyRectRenderer
+from profiler import NULL_PROFILER
 from ui import Menu
-from sound_manager import SoundManager
+from fonts import get_font
+from sound_manager import SoundManager, NullSoundManager
+from high_scores import high_score_store, TOP_N
 
 # Constants
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 FPS = 60
+HUD_HEIGHT = 50  # Score text and lives along the top of the screen
+MAX_BOUNCES = 8  # Contacts per ball per update with swept collisions
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 BLUE = (0, 0, 255)
@@ -26,30 +38,72 @@ SHRINK = 3
 EXPAND = 4
 
 class GameManager:
-    def __init__(self, screen):
+    def __init__(self, screen=None, headless=False, seed=None, renderer=None, swept_collisions=False,
+                 endless=False, font=None, large_font=None, menu=None, sound_manager=None):
         self.screen = screen
-        self.font = pygame.font.SysFont('Arial', 24)
-        self.large_font = pygame.font.SysFont('Arial', 36)
-        self.menu = Menu(screen, self.font, self.large_font)
-        self.sound_manager = SoundManager()
+        self.headless = headless
+        
+        # Move balls along their path and bounce at the exact time of impact,
+        # so fast balls and large time steps do not tunnel through bricks
+        self.swept_collisions = swept_collisions
+        
+        # After the last hand-made layout, keep going with generated ones
+        self.endless = endless
+        
+        if headless:
+            # Simulation only: no display, fonts or audio
+            self.font = None
+            self.large_font = None
+            self.menu = None
+            self.sound_manager = NullSoundManager()
+            self.brick_layer = None
+            self.renderer = None
+        else:
+            # Fonts, menu and sound can be shared with the caller, e.g. main.Game
+            self.font = font if font is not None else get_font('Arial', 24)
+            self.large_font = large_font if large_font is not None else get_font('Arial', 36)
+            self.sound_manager = sound_manager if sound_manager is not None else SoundManager()
+            self.brick_layer = BrickLayer()
+            self.renderer = renderer if renderer is not None else DirtyRectRenderer()
+            self.menu = menu if menu is not None else Menu(screen, self.font, self.large_font, self.renderer)
         
         # Game objects
         self.players = []
-        self.balls = []
-        self.bricks = []
-        self.powerups = []
-        self.lasers = []
+        self.balls = EntityList()
+        self.bricks = BrickList()
+        self.powerups = EntityList()
+        self.lasers = EntityList()
+        self.brick_grid = BrickGrid()
+        
+        # Frame profiler, a no-op unless profiling is turned on
+        self.profiler = NULL_PROFILER
+        
+        # High scores, netplay records them itself once a game over can no longer be rolled back
+        self.high_scores = self.load_high_scores()
+        self.record_scores = True
+        
+        # Initialize game
+        self.reset(seed)
+        
+    def reset(self, seed=None):
+        """
+        Start a new match.
+        Fonts, menu, sound, renderer and high scores are kept, only the match
+        state is built again, so starting another match takes less than a frame.
+        """
+        # Per-match random generator so a match can be reproduced from its seed
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = snapshot.TrackedRandom(self.seed)
         
         # Game state
         self.paused = False
+        self.pause_drawn = False
         self.current_layout = 1
         self.game_over = False
         self.winner = 0
+        self.frame = 0
+        self.hud_state = None
         
-        # High scores
-        self.high_scores = self.load_high_scores()
-        
-        # Initialize game
         self.init_game()
         
     def init_game(self):
@@ -67,22 +121,22 @@ class GameManager:
         self.players = [player1, player2]
         
         # Create initial balls
-        ball1 = Ball(SCREEN_WIDTH//4, SCREEN_HEIGHT - 50)
+        ball1 = Ball(SCREEN_WIDTH//4, SCREEN_HEIGHT - 50, rng=self.rng)
         ball1.attached_to = paddle1
         ball1.attach_offset = paddle1.rect.width // 2
         
-        ball2 = Ball(3*SCREEN_WIDTH//4, SCREEN_HEIGHT - 50)
+        ball2 = Ball(3*SCREEN_WIDTH//4, SCREEN_HEIGHT - 50, rng=self.rng)
         ball2.attached_to = paddle2
         ball2.attach_offset = paddle2.rect.width // 2
         
-        self.balls = [ball1, ball2]
+        self.balls = EntityList([ball1, ball2])
         
         # Create bricks
-        self.bricks = create_layout(self.current_layout, SCREEN_WIDTH, SCREEN_HEIGHT, Brick)
+        self.load_layout(self.current_layout)
         
         # Clear powerups and lasers
-        self.powerups = []
-        self.lasers = []
+        self.powerups = EntityList()
+        self.lasers = EntityList()
         
         # Reset game state
         self.paused = False
@@ -91,42 +145,94 @@ class GameManager:
         # Play game music
         self.sound_manager.play_music('gameplay')
         
+    def load_layout(self, layout_num):
+        self.current_layout = layout_num
+        if layout_num > LEVEL_COUNT:
+            # Endless mode, generated from the match seed so the match can be reproduced
+            level = level_cache.get((self.seed, layout_num), endless_level)
+            self.bricks = BrickList(build_bricks(level, Brick))
+        else:
+            self.bricks = BrickList(create_layout(layout_num, SCREEN_WIDTH, SCREEN_HEIGHT, Brick))
+            
+        # Ready before this one is cleared
+        next_layout = self.next_layout()
+        if next_layout > LEVEL_COUNT:
+            level_cache.prefetch((self.seed, next_layout), endless_level)
+        else:
+            level_cache.prefetch(next_layout)
+            
+        self.brick_grid.build(self.bricks)
+        if self.brick_layer is not None:
+            self.brick_layer.build(self.bricks)
+            self.renderer.invalidate()
+            
+    def next_layout(self):
+        if self.endless:
+            return self.current_layout + 1
+        return (self.current_layout % LEVEL_COUNT) + 1
+        
+    def hit_brick(self, brick, player_id):
+        """Register a hit on a brick, returns True if the brick was destroyed"""
+        if not brick.hit():
+            return False
+            
+        self.players[player_id-1].add_score(brick.points)
+        
+        # Check for powerup
+        if brick.should_drop_powerup(self.rng):
+            powerup_type = self.rng.randint(0, 4)  # Random powerup
+            self.powerups.append(PowerUp(brick.rect.centerx, brick.rect.centery, powerup_type))
+            
+        self.remove_brick(brick)
+        return True
+        
+    def remove_brick(self, brick):
+        self.bricks.remove(brick)
+        self.brick_grid.remove(brick)
+        if self.brick_layer is not None:
+            self.brick_layer.remove(brick, self.brick_grid.query_rect(brick.rect))
+            self.renderer.add(brick.rect)
+        
     def load_high_scores(self):
-        try:
-            if os.path.exists('data/high_scores.txt'):
-                with open('data/high_scores.txt', 'r') as f:
-                    scores = [int(line.strip()) for line in f.readlines()]
-                return sorted(scores, reverse=True)[:5]  # Top 5 scores
-            return [0, 0, 0, 0, 0]
-        except:
-            return [0, 0, 0, 0, 0]
-            
-    def save_high_scores(self):
-        os.makedirs('data', exist_ok=True)
-        with open('data/high_scores.txt', 'w') as f:
-            for score in self.high_scores:
-                f.write(f"{score}\n")
-                
+        if self.headless:
+            return [0] * TOP_N
+        # Read from disk once per process, shared by every GameManager
+        return high_score_store.top()
+        
     def update_high_scores(self, score):
-        self.high_scores.append(score)
-        self.high_scores = sorted(self.high_scores, reverse=True)[:5]  # Keep top 5
-        self.save_high_scores()
+        if self.headless:
+            self.high_scores = sorted(self.high_scores + [score], reverse=True)[:TOP_N]
+            return
+        high_score_store.add(
+            score,
+            players=[player.score for player in self.players],
+            winner=self.winner,
+            layout=self.current_layout,
+            date=datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            duration=round(self.frame / FPS, 2),
+            seed=self.seed,
+        )
+        self.high_scores = high_score_store.top()
         
-    def handle_input(self, keys):
+    def handle_input(self, keys, dt=1):
+        # Paddle positions before this update, for interpolation
+        for player in self.players:
+            player.paddle.prev_x = player.paddle.rect.x
+            
         if self.paused:
             return
             
         # Player 1 controls
         if keys[self.players[0].controls['left']]:
-            self.players[0].paddle.move('left', 0, SCREEN_WIDTH//2 - 10)
+            self.players[0].paddle.move('left', 0, SCREEN_WIDTH//2 - 10, dt)
         if keys[self.players[0].controls['right']]:
-            self.players[0].paddle.move('right', 0, SCREEN_WIDTH//2 - 10)
+            self.players[0].paddle.move('right', 0, SCREEN_WIDTH//2 - 10, dt)
             
         # Player 2 controls
         if keys[self.players[1].controls['left']]:
-            self.players[1].paddle.move('left', SCREEN_WIDTH//2 + 10, SCREEN_WIDTH)
+            self.players[1].paddle.move('left', SCREEN_WIDTH//2 + 10, SCREEN_WIDTH, dt)
         if keys[self.players[1].controls['right']]:
-            self.players[1].paddle.move('right', SCREEN_WIDTH//2 + 10, SCREEN_WIDTH)
+            self.players[1].paddle.move('right', SCREEN_WIDTH//2 + 10, SCREEN_WIDTH, dt)
             
     def handle_action_key(self, player_id):
         player = self.players[player_id - 1]
@@ -135,62 +241,106 @@ class GameManager:
         for ball in self.balls:
             if ball.attached_to == player.paddle:
                 ball.release()
-                self.sound_manager.play_sound('paddle_hit')
+                self.sound_manager.queue_sound('paddle_hit')
                 return
                 
         # If no balls are attached, try to shoot laser
         if player.paddle.laser_active and player.paddle.shoot_laser():
             laser = Laser(player.paddle.rect.centerx, player.paddle.rect.top)
             self.lasers.append(laser)
-            self.sound_manager.play_sound('laser')
+            self.sound_manager.queue_sound('laser')
+            
+    def inputs_from_keys(self, keys, actions=()):
+        """
+        Build the per-player input tuples used by step() from pygame key state.
+        actions holds the ids of players whose action key was pressed this frame.
+        """
+        return tuple(
+            (bool(keys[player.controls['left']]), bool(keys[player.controls['right']]), player.id in actions)
+            for player in self.players
+        )
+        
+    def step(self, inputs, n_frames=1, dt=1):
+        """
+        Advance the simulation by n_frames updates of dt frames each with the given inputs.
+        inputs holds one (left, right, action) tuple per player. Movement keys
+        are held for every frame, the action key is a single press on the
+        first frame, like a KEYDOWN event in the windowed game.
+        Returns the number of frames simulated, which is less than
+        n_frames * dt if the game ends.
+        """
+        keys = {}
+        for player, (left, right, action) in zip(self.players, inputs):
+            keys[player.controls['left']] = left
+            keys[player.controls['right']] = right
             
-    def update(self):
+        frames = 0
+        for frame in range(n_frames):
+            if self.game_over:
+                break
+            if frame == 0:
+                for player, (left, right, action) in zip(self.players, inputs):
+                    if action:
+                        self.handle_action_key(player.id)
+            self.handle_input(keys, dt)
+            self.profiler.lap('input')
+            self.update(dt)
+            frames += dt
+        return frames
+        
+    def update(self, dt=1):
+        """Advance the game by dt frames"""
         if self.paused or self.game_over:
+            # An action press while paused (releasing a ball, a laser shot) is
+            # heard now, not on the first frame after unpausing
+            self.sound_manager.flush()
             return
             
+        self.frame += dt
+        
         # Update paddles
         for player in self.players:
-            player.paddle.update()
-            
+            player.paddle.update(dt)
+        self.profiler.lap('update.paddles')
+        
+        # Collision tests this frame, reported to the profiler
+        collision_tests = 0
+        
         # Update balls
-        balls_to_remove = []
         for i, ball in enumerate(self.balls):
-            ball.update()
+            if self.swept_collisions and ball.attached_to is None:
+                collision_tests += self.sweep_ball(ball, dt)
+                if ball.pos.y + ball.radius > SCREEN_HEIGHT:
+                    # Ball went below bottom boundary
+                    self.balls.kill(i)
+                continue
+                
+            ball.update(dt)
             
             # Check wall collisions
             if ball.check_wall_collision(0, SCREEN_WIDTH, 0, SCREEN_HEIGHT):
                 # Ball went below bottom boundary
-                balls_to_remove.append(i)
+                self.balls.kill(i)
                 continue
                 
             # Check paddle collisions
             for player in self.players:
+                collision_tests += 1
                 if ball.check_paddle_collision(player.paddle):
-                    self.sound_manager.play_sound('paddle_hit')
+                    self.sound_manager.queue_sound('paddle_hit')
                     break
                     
-            # Check brick collisions
-            for j, brick in enumerate(self.bricks):
+            # Check brick collisions against nearby bricks only
+            for brick in self.brick_grid.query_circle(ball.pos.x, ball.pos.y, ball.radius):
+                collision_tests += 1
                 if ball.check_brick_collision(brick):
-                    self.sound_manager.play_sound('brick_hit')
-                    if brick.hit():
-                        # Brick is destroyed
-                        player_id = 1 if ball.pos.x < SCREEN_WIDTH//2 else 2
-                        self.players[player_id-1].add_score(brick.points)
-                        
-                        # Check for powerup
-                        if brick.should_drop_powerup():
-                            powerup_type = random.randint(0, 4)  # Random powerup
-                            self.powerups.append(PowerUp(brick.rect.centerx, brick.rect.centery, powerup_type))
-                            
-                        # Remove brick
-                        self.bricks.pop(j)
+                    self.sound_manager.queue_sound('brick_hit')
+                    player_id = 1 if ball.pos.x < SCREEN_WIDTH//2 else 2
+                    self.hit_brick(brick, player_id)
                     break
                     
         # Remove balls that went out of bounds
-        for i in sorted(balls_to_remove, reverse=True):
-            if i < len(self.balls):
-                self.balls.pop(i)
+        self.balls.compact()
                 
         # Check if player lost all balls in their half
         player1_has_balls = False
@@ -207,7 +357,7 @@ class GameManager:
             self.players[0].lose_life()
             if self.players[0].lives > 0:
                 # Add a new ball
-                ball = Ball(SCREEN_WIDTH//4, SCREEN_HEIGHT - 50)
+                ball = Ball(SCREEN_WIDTH//4, SCREEN_HEIGHT - 50, rng=self.rng)
                 ball.attached_to = self.players[0].paddle
                 ball.attach_offset = self.players[0].paddle.rect.width // 2
                 self.balls.append(ball)
@@ -216,75 +366,71 @@ class GameManager:
             self.players[1].lose_life()
             if self.players[1].lives > 0:
                 # Add a new ball
-                ball = Ball(3*SCREEN_WIDTH//4, SCREEN_HEIGHT - 50)
+                ball = Ball(3*SCREEN_WIDTH//4, SCREEN_HEIGHT - 50, rng=self.rng)
                 ball.attached_to = self.players[1].paddle
                 ball.attach_offset = self.players[1].paddle.rect.width // 2
                 self.balls.append(ball)
-                
+        self.profiler.lap('update.balls')
+        
         # Update powerups
-        powerups_to_remove = []
         for i, powerup in enumerate(self.powerups):
-            powerup.update()
+            powerup.update(dt)
             
             # Check if powerup is out of bounds
             if powerup.pos.y > SCREEN_HEIGHT:
-                powerups_to_remove.append(i)
+                self.powerups.kill(i)
                 continue
                 
             # Check paddle collisions
             for player in self.players:
+                collision_tests += 1
                 if powerup.check_paddle_collision(player.paddle):
-                    self.sound_manager.play_sound('powerup')
+                    self.sound_manager.queue_sound('powerup')
                     self.apply_powerup(powerup, player)
-                    powerups_to_remove.append(i)
+                    self.powerups.kill(i)
                     break
                     
         # Remove collected or out-of-bounds powerups
-        for i in sorted(powerups_to_remove, reverse=True):
-            if i < len(self.powerups):
-                self.powerups.pop(i)
-                
+        self.powerups.compact()
+        self.profiler.lap('update.powerups')
+        
         # Update lasers
-        lasers_to_remove = []
         for i, laser in enumerate(self.lasers):
-            laser.update()
+            start = laser.rect.copy() if self.swept_collisions else None
+            laser.update(dt)
             
             # Check if laser is out of bounds
             if laser.rect.bottom < 0:
-                lasers_to_remove.append(i)
+                self.lasers.kill(i)
                 continue
                 
-            # Check brick collisions
-            for j, brick in enumerate(self.bricks):
-                if laser.check_brick_collision(brick):
+            # Check brick collisions against nearby bricks only
+            if start is None:
+                path = laser.rect
+                candidates = self.brick_grid.query_rect(path)
+            else:
+                # Everything the laser passed this update, nearest brick first
+                path = laser.rect.union(start)
+                candidates = sorted(self.brick_grid.query_rect(path), key=lambda brick: -brick.rect.bottom)
+            for brick in candidates:
+                collision_tests += 1
+                if path.colliderect(brick.rect):
                     # Determine which player shot the laser
                     player_id = 1 if laser.rect.x < SCREEN_WIDTH//2 else 2
-                    
-                    if brick.hit():
-                        # Brick is destroyed
-                        self.players[player_id-1].add_score(brick.points)
-                        
-                        # Check for powerup
-                        if brick.should_drop_powerup():
-                            powerup_type = random.randint(0, 4)  # Random powerup
-                            self.powerups.append(PowerUp(brick.rect.centerx, brick.rect.centery, powerup_type))
-                            
-                        # Remove brick
-                        self.bricks.pop(j)
-                        
-                    lasers_to_remove.append(i)
-                    self.sound_manager.play_sound('brick_hit')
+                    self.hit_brick(brick, player_id)
+                    self.lasers.kill(i)
+                    self.sound_manager.queue_sound('brick_hit')
                     break
                     
         # Remove lasers that hit bricks or went out of bounds
-        for i in sorted(lasers_to_remove, reverse=True):
-            if i < len(self.lasers):
-                self.lasers.pop(i)
-                
+        self.lasers.compact()
+        self.profiler.lap('update.lasers')
+        self.profiler.count('collision_tests', collision_tests)
+        
         # Check for game over conditions
         if self.players[0].lives <= 0 or self.players[1].lives <= 0:
             self.game_over = True
-            self.sound_manager.play_sound('game_over')
+            self.sound_manager.queue_sound('game_over')
             
             # Determine winner
             if self.players[0].lives <= 0 and self.players[1].lives <= 0:
@@ -300,14 +446,78 @@ class GameManager:
                 
             # Update high scores
             max_score = max(self.players[0].score, self.players[1].score)
-            self.update_high_scores(max_score)
-            
+            if self.record_scores:
+                self.update_high_scores(max_score)
+        self.profiler.lap('update.game_over')
+        
         # Check if all bricks are destroyed
         if len(self.bricks) == 0:
             # Load next layout
-            self.current_layout = (self.current_layout % 5) + 1
-            self.bricks = create_layout(self.current_layout, SCREEN_WIDTH, SCREEN_HEIGHT, Brick)
+            self.load_layout(self.next_layout())
+        self.profiler.lap('update.bricks')
+        
+        # Play this frame's sounds, merged and limited
+        self.sound_manager.flush()
+        self.profiler.lap('update.sound')
             
+    def sweep_ball(self, ball, dt):
+        """
+        Move a free ball dt frames along its path with swept collisions.
+        The ball stops at the earliest wall, paddle or brick it touches,
+        bounces and carries on with the rest of the move, up to MAX_BOUNCES
+        times. Returns the number of collision tests made.
+        """
+        tests = 0
+        remaining = dt
+        radius = ball.radius
+        ball.prev.update(ball.pos)
+        for _ in range(MAX_BOUNCES):
+            x, y = ball.pos.x, ball.pos.y
+            dx = ball.velocity.x * remaining
+            dy = ball.velocity.y * remaining
+            
+            # Earliest contact along the move, walls first, then paddles, then bricks in layout order
+            contact = sweep_circle_walls(x, y, dx, dy, radius, 0, SCREEN_WIDTH, 0)
+            target = None
+            for player in self.players:
+                tests += 1
+                hit = sweep_circle_rect(x, y, dx, dy, radius, player.paddle.rect)
+                if hit is not None and (contact is None or hit[0] < contact[0]):
+                    contact, target = hit, player.paddle
+            for brick in self.brick_grid.query(min(x, x + dx) - radius, min(y, y + dy) - radius,
+                                               max(x, x + dx) + radius, max(y, y + dy) + radius):
+                tests += 1
+                hit = sweep_circle_rect(x, y, dx, dy, radius, brick.rect)
+                if hit is not None and (contact is None or hit[0] < contact[0]):
+                    contact, target = hit, brick
+                    
+            if contact is None:
+                ball.pos.x = x + dx
+                ball.pos.y = y + dy
+                break
+                
+            t, nx, ny = contact
+            ball.pos.x = x + dx * t
+            ball.pos.y = y + dy * t
+            remaining *= 1 - t
+            
+            if isinstance(target, Paddle):
+                ball.bounce_off_paddle(target)
+                self.sound_manager.queue_sound('paddle_hit')
+                if ball.attached_to is not None:
+                    break
+                continue
+                
+            # Reflect off the wall or brick
+            dot = ball.velocity.x * nx + ball.velocity.y * ny
+            ball.velocity.x -= 2 * dot * nx
+            ball.velocity.y -= 2 * dot * ny
+            if target is not None:
+                self.sound_manager.queue_sound('brick_hit')
+                player_id = 1 if ball.pos.x < SCREEN_WIDTH//2 else 2
+                self.hit_brick(target, player_id)
+        return tests
+        
     def apply_powerup(self, powerup, player):
         if powerup.type == MULTIBALL:
             # Add two more balls
@@ -315,7 +525,8 @@ class GameManager:
                 ball = Ball(
                     player.paddle.rect.centerx,
                     player.paddle.rect.top - 10,
-                    speed=5
+                    speed=5,
+                    rng=self.rng
                 )
                 self.balls.append(ball)
                 
@@ -334,35 +545,69 @@ class GameManager:
             # Expand player's paddle
             player.paddle.resize(1.3)
             
-    def draw(self):
+    def draw(self, alpha=1.0):
+        """
+        Draw the game. alpha in [0, 1] places moving objects between their
+        position before and after the last update, for rendering between ticks.
+        """
+        if self.paused and self.pause_drawn:
+            # The game frame and overlay are already on screen, only buttons can change
+            self.menu.draw_pause_menu(pygame.mouse.get_pos())
+            return
+            
         self.screen.fill(BLACK)
         
         # Draw game UI
         self.menu.draw_game_ui(self.players)
         
-        # Draw bricks
-        for brick in self.bricks:
-            brick.draw(self.screen)
+        # Draw bricks from the cached layer
+        self.brick_layer.draw(self.screen)
+            
+        # Nothing moves while paused
+        if self.paused:
+            alpha = 1.0
             
         # Draw paddles
         for player in self.players:
-            player.paddle.draw(self.screen)
+            self.renderer.add(player.paddle.draw(self.screen, alpha))
             
         # Draw balls
         for ball in self.balls:
-            ball.draw(self.screen)
+            self.renderer.add(ball.draw(self.screen, alpha))
             
         # Draw powerups
         for powerup in self.powerups:
-            powerup.draw(self.screen)
+            self.renderer.add(powerup.draw(self.screen, alpha))
             
         # Draw lasers
         for laser in self.lasers:
-            laser.draw(self.screen)
+            self.renderer.add(laser.draw(self.screen, alpha))
+            
+        # Score and lives only need presenting when they change
+        hud_state = tuple((player.score, player.lives) for player in self.players)
+        if hud_state != self.hud_state:
+            self.hud_state = hud_state
+            self.renderer.add((0, 0, SCREEN_WIDTH, HUD_HEIGHT))
             
         # Draw pause menu if paused
         if self.paused:
+            self.menu.invalidate()
             self.menu.draw_pause_menu(pygame.mouse.get_pos())
+            self.pause_drawn = True
             
     def toggle_pause(self):
         self.paused = not self.paused
+        self.pause_drawn = False
+        if self.renderer is not None:
+            self.renderer.invalidate()
+            
+    def save_state(self, base=None):
+        """
+        Snapshot of the simulation state as bytes, for rollback in netplay and save states.
+        With a full snapshot as base only the bricks changed since then are stored.
+        """
+        return snapshot.take(self, base)
+        
+    def load_state(self, state, base=None):
+        """Restore a state from save_state(), the same state can be loaded again"""
+        snapshot.restore(self, state, base)
@@ -20,6 +20,15 @@ LASER = 2
 SHRINK = 3
 EXPAND = 4
 
+# Power-up colors, indexed by type
+POWERUP_COLORS = (YELLOW, GREEN, RED, BLUE, WHITE)
+
+def lerp(previous, current, alpha):
+    """Value between the previous and current update for drawing, alpha 1 is current"""
+    if alpha >= 1:
+        return current
+    return previous + (current - previous) * alpha
+    
 class Player:
     def __init__(self, player_id, controls, screen_half):
         self.id = player_id
@@ -48,15 +57,18 @@ class Paddle:
         self.sticky = False
         self.laser_active = False
         self.laser_cooldown = 0
+        self.prev_x = x  # Position before the last update, for interpolation
         
-    def draw(self, screen):
-        pygame.draw.rect(screen, self.color, self.rect)
+    def draw(self, screen, alpha=1.0):
+        """Draw between the previous and current position, returns the area drawn"""
+        rect = self.rect.move(round(lerp(self.prev_x, self.rect.x, alpha)) - self.rect.x, 0)
+        return pygame.draw.rect(screen, self.color, rect)
         
-    def move(self, direction, boundary_left, boundary_right):
+    def move(self, direction, boundary_left, boundary_right, dt=1):
         if direction == 'left':
-            self.rect.x -= self.speed
+            self.rect.x -= self.speed * dt
         elif direction == 'right':
-            self.rect.x += self.speed
+            self.rect.x += self.speed * dt
             
         # Keep paddle within boundaries
         if self.rect.left < boundary_left:
@@ -75,26 +87,38 @@ class Paddle:
             return True
         return False
         
-    def update(self):
+    def update(self, dt=1):
         if self.laser_cooldown > 0:
-            self.laser_cooldown -= 1
+            self.laser_cooldown -= dt
             
 class Ball:
-    def __init__(self, x, y, radius=10, color=WHITE, speed=5):
+    __slots__ = ('pos', 'prev', 'radius', 'color', 'speed', 'velocity', 'attached_to', 'attach_offset')
+    
+    def __init__(self, x, y, radius=10, color=WHITE, speed=5, rng=random):
         self.pos = pygame.Vector2(x, y)
         self.radius = radius
         self.color = color
         self.speed = speed
-        self.velocity = pygame.Vector2(random.choice([-1, 1]) * speed / 2, -speed)
+        self.velocity = pygame.Vector2(rng.choice([-1, 1]) * speed / 2, -speed)
         self.attached_to = None
         self.attach_offset = 0
+        self.prev = pygame.Vector2(x, y)  # Position before the last update, for interpolation
         
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (int(self.pos.x), int(self.pos.y)), self.radius)
+    def draw(self, screen, alpha=1.0):
+        """Draw between the previous and current position, returns the area drawn"""
+        x = lerp(self.prev.x, self.pos.x, alpha)
+        y = lerp(self.prev.y, self.pos.y, alpha)
+        return pygame.draw.circle(screen, self.color, (int(x), int(y)), self.radius)
         
-    def update(self):
+    def get_rect(self):
+        """Screen area covered by the ball when drawn"""
+        return pygame.Rect(int(self.pos.x) - self.radius - 1, int(self.pos.y) - self.radius - 1,
+                           2 * self.radius + 2, 2 * self.radius + 2)
+        
+    def update(self, dt=1):
+        self.prev.update(self.pos)
         if self.attached_to is None:
-            self.pos += self.velocity
+            self.pos += self.velocity * dt
         else:
             # If ball is attached to paddle (sticky powerup)
             self.pos.x = self.attached_to.rect.x + self.attach_offset
@@ -123,26 +147,28 @@ class Ball:
             
         if self.pos.y + self.radius >= paddle.rect.top and self.pos.y - self.radius <= paddle.rect.bottom:
             if self.pos.x + self.radius >= paddle.rect.left and self.pos.x - self.radius <= paddle.rect.right:
-                # Calculate bounce angle based on where ball hit the paddle
-                relative_intersect_x = (paddle.rect.centerx - self.pos.x) / (paddle.rect.width / 2)
-                bounce_angle = relative_intersect_x * (math.pi / 3)  # Max 60 degree bounce
-                
-                # Set new velocity
-                speed = math.sqrt(self.velocity.x**2 + self.velocity.y**2)
-                self.velocity.x = -speed * math.sin(bounce_angle)
-                self.velocity.y = -speed * math.cos(bounce_angle)
-                
-                # Position adjustment to prevent sticking
-                self.pos.y = paddle.rect.top - self.radius
-                
-                # Handle sticky paddle
-                if paddle.sticky:
-                    self.attached_to = paddle
-                    self.attach_offset = self.pos.x - paddle.rect.x
-                    
+                self.bounce_off_paddle(paddle)
                 return True
         return False
         
+    def bounce_off_paddle(self, paddle):
+        # Calculate bounce angle based on where ball hit the paddle
+        relative_intersect_x = (paddle.rect.centerx - self.pos.x) / (paddle.rect.width / 2)
+        bounce_angle = relative_intersect_x * (math.pi / 3)  # Max 60 degree bounce
+        
+        # Set new velocity
+        speed = math.sqrt(self.velocity.x**2 + self.velocity.y**2)
+        self.velocity.x = -speed * math.sin(bounce_angle)
+        self.velocity.y = -speed * math.cos(bounce_angle)
+        
+        # Position adjustment to prevent sticking
+        self.pos.y = paddle.rect.top - self.radius
+        
+        # Handle sticky paddle
+        if paddle.sticky:
+            self.attached_to = paddle
+            self.attach_offset = self.pos.x - paddle.rect.x
+        
     def check_brick_collision(self, brick):
         # Calculate the closest point on the brick to the ball
         closest_x = max(brick.rect.left, min(self.pos.x, brick.rect.right))
@@ -170,6 +196,8 @@ class Ball:
             self.velocity.y = -abs(self.velocity.y)  # Ensure ball goes upward
             
 class Brick:
+    __slots__ = ('rect', 'color', 'points', 'hits_to_break', 'hits', 'powerup_chance')
+    
     def __init__(self, x, y, width=60, height=20, color=RED, points=10, hits_to_break=1):
         self.rect = pygame.Rect(x, y, width, height)
         self.color = color
@@ -185,34 +213,35 @@ class Brick:
         self.hits += 1
         return self.hits >= self.hits_to_break
         
-    def should_drop_powerup(self):
-        return random.random() < self.powerup_chance
+    def should_drop_powerup(self, rng=random):
+        return rng.random() < self.powerup_chance
         
 class PowerUp:
+    __slots__ = ('pos', 'prev_y', 'type', 'radius', 'speed', 'active', 'color')
+    
     def __init__(self, x, y, type_id):
         self.pos = pygame.Vector2(x, y)
+        self.prev_y = y
         self.type = type_id
         self.radius = 10
         self.speed = 2
         self.active = True
         
         # Set color based on type
-        if self.type == MULTIBALL:
-            self.color = YELLOW
-        elif self.type == STICKY:
-            self.color = GREEN
-        elif self.type == LASER:
-            self.color = RED
-        elif self.type == SHRINK:
-            self.color = BLUE
-        elif self.type == EXPAND:
-            self.color = WHITE
+        self.color = POWERUP_COLORS[type_id]
             
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (int(self.pos.x), int(self.pos.y)), self.radius)
+    def draw(self, screen, alpha=1.0):
+        y = lerp(self.prev_y, self.pos.y, alpha)
+        return pygame.draw.circle(screen, self.color, (int(self.pos.x), int(y)), self.radius)
+        
+    def get_rect(self):
+        """Screen area covered by the powerup when drawn"""
+        return pygame.Rect(int(self.pos.x) - self.radius - 1, int(self.pos.y) - self.radius - 1,
+                           2 * self.radius + 2, 2 * self.radius + 2)
         
-    def update(self):
-        self.pos.y += self.speed
+    def update(self, dt=1):
+        self.prev_y = self.pos.y
+        self.pos.y += self.speed * dt
         
     def check_paddle_collision(self, paddle):
         if (self.pos.y + self.radius >= paddle.rect.top and 
@@ -223,16 +252,21 @@ class PowerUp:
         return False
         
 class Laser:
+    __slots__ = ('rect', 'prev_y', 'speed', 'color')
+    
     def __init__(self, x, y, speed=10, color=RED):
         self.rect = pygame.Rect(x - 2, y, 4, 10)
+        self.prev_y = y
         self.speed = speed
         self.color = color
         
-    def draw(self, screen):
-        pygame.draw.rect(screen, self.color, self.rect)
+    def draw(self, screen, alpha=1.0):
+        rect = self.rect.move(0, round(lerp(self.prev_y, self.rect.y, alpha)) - self.rect.y)
+        return pygame.draw.rect(screen, self.color, rect)
         
-    def update(self):
-        self.rect.y -= self.speed
+    def update(self, dt=1):
+        self.prev_y = self.rect.y
+        self.rect.y -= self.speed * dt
         
     def check_brick_collision(self, brick):
         return self.rect.colliderect(brick.rect)
@@ -0,0 +1,176 @@
+import heapq
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+LOG_PATH = 'data/high_scores.jsonl'
+LEGACY_PATH = 'data/high_scores.txt'  # One score per line, read once into a new log
+
+TOP_N = 5  # Scores shown in the menu
+KEEP = 100  # Best entries kept in memory and through compaction
+COMPACT_LINES = 1000  # Compact the log when it holds more entries than this
+
+class FileLock:
+    """
+    Exclusive lock on a separate lock file, shared by every process using the log.
+    The log itself is replaced on compaction, so it cannot carry the lock.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.file.close()
+        self.file = None
+
+class HighScoreStore:
+    """
+    High scores in an append-only log, one JSON entry per line.
+    Each game over appends its entry under the lock, after reading whatever
+    other processes appended since, so games on the same machine never
+    overwrite each other. The best `keep` entries are held in a heap; the
+    log is read once per process and then only from where it was left.
+    When it grows past COMPACT_LINES it is rewritten with the kept entries
+    and swapped in with os.replace.
+    """
+    def __init__(self, path=LOG_PATH, legacy_path=LEGACY_PATH, keep=KEEP):
+        self.path = path
+        self.lock_path = path + '.lock'
+        self.legacy_path = legacy_path
+        self.keep = keep
+        self.heap = []  # (score, -sequence, entry), lowest kept score first
+        self.sequence = 0  # Order entries were read in, older entries win ties
+        self.lines = 0  # Entries in the log file
+        self.offset = 0  # Bytes of the log read so far
+        self.inode = None
+        self.last_line = b''  # Last entry read, still found before offset unless the log was replaced
+        self.loaded = False
+
+    def load(self):
+        """Read the log, only the first time"""
+        if self.loaded:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with FileLock(self.lock_path):
+            if not os.path.exists(self.path) and os.path.exists(self.legacy_path):
+                self.migrate()
+            self.read_new()
+        self.loaded = True
+
+    def migrate(self):
+        """Turn the old one-score-per-line file into a log, the old file is left as it was"""
+        entries = []
+        with open(self.legacy_path) as f:
+            for line in f:
+                try:
+                    entries.append({'score': int(line.strip()), 'legacy': True})
+                except ValueError:
+                    print(f"Skipping bad high score line: {line.strip()!r}")
+        self.write_log(entries)
+
+    def read_new(self):
+        """Read the entries appended since the last read, the lock must be held"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        with open(self.path, 'rb') as f:
+            if stat.st_ino == self.inode and stat.st_size >= self.offset and self.offset:
+                # The inode of a log replaced by compaction can be reused, so also
+                # check that the last entry read is still where it was
+                f.seek(self.offset - len(self.last_line))
+                if f.read(len(self.last_line)) != self.last_line:
+                    self.inode = None
+            if stat.st_ino != self.inode or stat.st_size < self.offset:
+                # New or compacted by another process, read it all again
+                self.heap = []
+                self.lines = 0
+                self.offset = 0
+                self.last_line = b''
+                self.inode = stat.st_ino
+            f.seek(self.offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1  # A line still being written is read next time
+        if end:
+            self.last_line = data[data.rfind(b'\n', 0, end - 1) + 1:end]
+        for line in data[:end].splitlines():
+            self.lines += 1
+            try:
+                entry = json.loads(line)
+                entry['score'] = int(entry['score'])
+            except (ValueError, KeyError, TypeError):
+                print(f"Skipping bad high score entry: {line[:80]!r}")
+                continue
+            self.push(entry)
+        self.offset += end
+
+    def push(self, entry):
+        item = (entry['score'], -self.sequence, entry)
+        self.sequence += 1
+        if len(self.heap) < self.keep:
+            heapq.heappush(self.heap, item)
+        else:
+            heapq.heappushpop(self.heap, item)
+
+    def add(self, score, **metadata):
+        """Append a score with its metadata (players, layout, date, duration...)"""
+        self.load()
+        entry = {'score': score, **metadata}
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with FileLock(self.lock_path):
+            with open(self.path, 'ab') as f:
+                f.write(line.encode())
+                f.flush()
+                os.fsync(f.fileno())
+            # Picks up this entry and any other process's since the last read
+            self.read_new()
+            if self.lines > COMPACT_LINES:
+                self.compact()
+        return entry
+
+    def compact(self):
+        """Rewrite the log with only the kept entries, the lock must be held"""
+        self.write_log([entry for _, _, entry in sorted(self.heap, key=lambda item: -item[1])])
+        self.inode = None  # The new log may reuse the old inode, read it all again
+        self.read_new()
+
+    def write_log(self, entries):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def top_entries(self, n=TOP_N):
+        """The n best entries, best first"""
+        self.load()
+        return [entry for _, _, entry in heapq.nlargest(n, self.heap)]
+
+    def top(self, n=TOP_N):
+        """The n best scores, best first, padded with zeros"""
+        scores = [entry['score'] for entry in self.top_entries(n)]
+        return scores + [0] * (n - len(scores))
+
+# Shared by every GameManager in the process
+high_score_store = HighScoreStore()
@@ -0,0 +1,246 @@
+import argparse
+import json
+import random
+import sys
+import time
+
+# Constants
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+LEVEL_COUNT = 5  # Hand-made levels, endless mode generates the ones after them
+
+# Area bricks are generated in, the left half is generated and mirrored to the right
+FIELD_LEFT = 20
+FIELD_TOP = 50
+FIELD_BOTTOM = 400
+HALF_WIDTH = SCREEN_WIDTH // 2
+
+# Cell size of the overlap index, matches the 60x20 bricks used by the level files
+CELL_WIDTH = 60
+CELL_HEIGHT = 20
+
+MAX_ATTEMPTS = 200  # Pattern placements tried before giving up on reaching max_bricks
+
+# Colors
+RED = (255, 0, 0)
+ORANGE = (255, 165, 0)
+YELLOW = (255, 255, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+
+# Single-hit bricks take one of the first three colors, then 2 and 3 hits
+PALETTE = [YELLOW, GREEN, BLUE, ORANGE, RED]
+HIT_COLORS = {2: 3, 3: 4}
+
+PATTERNS = ('fill', 'checker', 'diamond', 'frame', 'stripes', 'triangle')
+
+def overlaps(a, b):
+    """True if two (x, y, width, height, ...) bricks overlap, touching edges do not count"""
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+class RectIndex:
+    """
+    Uniform grid of bricks for overlap tests.
+    Each brick is stored in every cell its interior touches, so only bricks
+    sharing a cell have to be compared.
+    """
+    def __init__(self, cell_width=CELL_WIDTH, cell_height=CELL_HEIGHT):
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.cells = {}
+
+    def cell_keys(self, brick):
+        x, y, width, height = brick[:4]
+        rows = range(y // self.cell_height, (y + height - 1) // self.cell_height + 1)
+        return [(col, row) for col in range(x // self.cell_width, (x + width - 1) // self.cell_width + 1) for row in rows]
+
+    def overlapping(self, brick):
+        """Indices of the stored bricks overlapping this one"""
+        x, y, width, height = brick[:4]
+        right = x + width
+        bottom = y + height
+        cells = self.cells
+        found = set()
+        for key in self.cell_keys(brick):
+            for i, other in cells.get(key, ()):
+                # overlaps(), inlined as this is the hot loop
+                if other[0] < right and x < other[0] + other[2] and other[1] < bottom and y < other[1] + other[3]:
+                    found.add(i)
+        return found
+
+    def collides(self, brick):
+        """True if any stored brick overlaps this one"""
+        x, y, width, height = brick[:4]
+        right = x + width
+        bottom = y + height
+        cells = self.cells
+        for key in self.cell_keys(brick):
+            for i, other in cells.get(key, ()):
+                if other[0] < right and x < other[0] + other[2] and other[1] < bottom and y < other[1] + other[3]:
+                    return True
+        return False
+
+    def add(self, i, brick):
+        cells = self.cells
+        for key in self.cell_keys(brick):
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [(i, brick)]
+            else:
+                cell.append((i, brick))
+
+def find_overlaps(bricks):
+    """All (i, j) pairs of overlapping bricks with i < j"""
+    # Cells as large as the largest brick, so each brick is in at most 4 cells
+    index = RectIndex(max((brick[2] for brick in bricks), default=CELL_WIDTH),
+                      max((brick[3] for brick in bricks), default=CELL_HEIGHT))
+    pairs = []
+    for j, brick in enumerate(bricks):
+        pairs.extend((i, j) for i in sorted(index.overlapping(brick)))
+        index.add(j, brick)
+    return pairs
+
+def validate_bricks(bricks, max_bricks=None, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+    """
+    Check a level's bricks, [x, y, width, height, ...] each.
+    Returns a list of problems, empty if the level is valid.
+    """
+    problems = []
+    if max_bricks is not None and len(bricks) > max_bricks:
+        problems.append(f"{len(bricks)} bricks, more than {max_bricks}")
+    for i, brick in enumerate(bricks):
+        x, y, w, h = brick[:4]
+        if w <= 0 or h <= 0 or x < 0 or y < 0 or x + w > width or y + h > height:
+            problems.append(f"brick {i} at {list(brick[:4])} is outside the screen")
+    for i, j in find_overlaps(bricks):
+        problems.append(f"bricks {i} and {j} overlap")
+    return problems
+
+def pattern_cells(pattern, cols, rows):
+    """Cells (col, row) of a cols x rows block that hold a brick"""
+    for row in range(rows):
+        for col in range(cols):
+            if pattern == 'fill':
+                keep = True
+            elif pattern == 'checker':
+                keep = (row + col) % 2 == 0
+            elif pattern == 'diamond':
+                keep = abs(col - (cols - 1) / 2) / cols + abs(row - (rows - 1) / 2) / rows <= 0.5
+            elif pattern == 'frame':
+                keep = row in (0, rows - 1) or col in (0, cols - 1)
+            elif pattern == 'stripes':
+                keep = row % 2 == 0
+            else:  # Triangle
+                keep = col <= row * cols // rows
+            if keep:
+                yield col, row
+
+def generate_level(seed, max_bricks=120, multi_hit_share=0.2, brick_size=(60, 20), name=None):
+    """
+    Generate a level from a seed, in the same form as the level files:
+    {'name', 'palette', 'bricks'} with bricks [x, y, width, height, color, points, hits].
+
+    Blocks of bricks in random patterns are placed in the left half until
+    max_bricks is reached or no more fit, each brick is only kept if it does
+    not overlap the ones before it. The right half is the mirror image, so
+    both players face the same bricks. multi_hit_share of the bricks (on each
+    side) take 2 or 3 hits.
+    """
+    rng = random.Random(seed)
+    brick_width, brick_height = brick_size
+    half_max = max_bricks // 2
+    index = RectIndex(max(brick_width, CELL_WIDTH), max(brick_height, CELL_HEIGHT))
+    left = []
+    colors = []
+
+    for _ in range(MAX_ATTEMPTS):
+        if len(left) >= half_max:
+            break
+        gap = rng.choice((0, 2, 5, 10))
+        cols = rng.randint(2, max(2, (HALF_WIDTH - FIELD_LEFT) // (brick_width + gap)))
+        rows = rng.randint(2, 6)
+        width = cols * (brick_width + gap) - gap
+        height = rows * (brick_height + gap) - gap
+        if width > HALF_WIDTH - FIELD_LEFT or height > FIELD_BOTTOM - FIELD_TOP:
+            continue
+        x0 = rng.randint(FIELD_LEFT, HALF_WIDTH - width)
+        y0 = rng.randint(FIELD_TOP, FIELD_BOTTOM - height)
+        color = rng.randrange(3)
+
+        for col, row in pattern_cells(rng.choice(PATTERNS), cols, rows):
+            if len(left) >= half_max:
+                break
+            brick = (x0 + col * (brick_width + gap), y0 + row * (brick_height + gap), brick_width, brick_height)
+            if not index.collides(brick):
+                index.add(len(left), brick)
+                left.append(brick)
+                colors.append(color)
+
+    # Exact share of multi-hit bricks, chosen at random
+    hits = [1] * len(left)
+    for i in rng.sample(range(len(left)), round(multi_hit_share * len(left))):
+        hits[i] = rng.choice((2, 3))
+
+    bricks = []
+    for (x, y, w, h), color, brick_hits in zip(left, colors, hits):
+        color = HIT_COLORS.get(brick_hits, color)
+        points = brick_hits * 10
+        bricks.append([x, y, w, h, color, points, brick_hits])
+        bricks.append([SCREEN_WIDTH - x - w, y, w, h, color, points, brick_hits])
+    bricks.sort(key=lambda brick: (brick[1], brick[0]))
+
+    return {
+        'name': name or f"Generated {seed}",
+        'palette': [list(color) for color in PALETTE],
+        'bricks': bricks,
+    }
+
+def endless_level(key):
+    """
+    Level of an endless match, key is (match seed, layout number after the
+    hand-made ones). Returns (palette, records) for levels.build_bricks.
+    Later levels have more bricks and more multi-hit bricks.
+    """
+    match_seed, layout_num = key
+    stage = layout_num - LEVEL_COUNT
+    level = generate_level(
+        seed=match_seed * 1000003 + layout_num,
+        max_bricks=min(200, 80 + 10 * stage),
+        multi_hit_share=min(0.6, 0.1 + 0.05 * stage),
+    )
+    return level['palette'], level['bricks']
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a brick level or check the level files")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the generated level")
+    parser.add_argument('--max-bricks', type=int, default=120, help="maximum number of bricks")
+    parser.add_argument('--multi-hit', type=float, default=0.2, help="share of bricks taking 2 or 3 hits")
+    parser.add_argument('--brick-size', type=int, nargs=2, default=(60, 20), metavar=('W', 'H'))
+    parser.add_argument('--out', metavar='PATH', help="write the level as a JSON level file")
+    parser.add_argument('--check', action='store_true', help="validate the level files and exit")
+    args = parser.parse_args()
+
+    if args.check:
+        from levels import load_level
+        for num in range(1, LEVEL_COUNT + 1):
+            palette, records = load_level(num)
+            problems = validate_bricks(records)
+            print(f"level{num}: {len(records)} bricks, {len(problems)} problems")
+            for problem in problems[:10]:
+                print(f"  {problem}")
+        sys.exit()
+
+    start = time.perf_counter()
+    level = generate_level(args.seed, args.max_bricks, args.multi_hit, tuple(args.brick_size))
+    generated = time.perf_counter()
+    problems = validate_bricks(level['bricks'], args.max_bricks)
+    validated = time.perf_counter()
+    multi_hit = sum(1 for brick in level['bricks'] if brick[6] > 1)
+    print(f"{len(level['bricks'])} bricks, {multi_hit} multi-hit, {len(problems)} problems, "
+          f"generated in {(generated - start) * 1000:.2f} ms, validated in {(validated - generated) * 1000:.2f} ms")
+    for problem in problems:
+        print(f"  {problem}")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(level, f, indent=2)
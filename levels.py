@@ -0,0 +1,168 @@
+import json
+import os
+import struct
+import sys
+import tempfile
+import threading
+
+# Next to this file, so headless tools work from any directory
+LEVEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'levels')
+LEVEL_COUNT = 5
+
+# Compiled level: header, palette, then one fixed-size record per brick
+MAGIC = b'BBLV'
+VERSION = 1
+HEADER = struct.Struct('<4sBBH')  # Magic, version, palette size, brick count
+COLOR = struct.Struct('<BBB')
+RECORD = struct.Struct('<hhHHBHB')  # x, y, width, height, color index, points, hits to break
+
+def source_path(num):
+    return os.path.join(LEVEL_DIR, f'level{num}.json')
+
+def compiled_path(num):
+    return os.path.join(LEVEL_DIR, f'level{num}.bin')
+
+def compile_level(level):
+    """
+    Compile a level read from its JSON file into bytes.
+    The JSON has a palette of RGB colors and a list of bricks, each
+    [x, y, width, height, color index, points, hits to break].
+    """
+    palette = level['palette']
+    bricks = level['bricks']
+    data = bytearray(HEADER.pack(MAGIC, VERSION, len(palette), len(bricks)))
+    for color in palette:
+        data += COLOR.pack(*color)
+    for brick in bricks:
+        if not 0 <= brick[4] < len(palette):
+            raise ValueError(f"Color index out of range in {level.get('name')}: {brick}")
+        data += RECORD.pack(*brick)
+    return bytes(data)
+
+def read_level(data):
+    """Palette and brick records of a compiled level, ValueError if it is damaged or of another version"""
+    if len(data) < HEADER.size:
+        raise ValueError("Compiled level is truncated")
+    magic, version, n_colors, n_bricks = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a compiled level of this version")
+    start = HEADER.size
+    end = start + n_colors * COLOR.size
+    if len(data) < end + n_bricks * RECORD.size:
+        raise ValueError("Compiled level is truncated")
+    palette = list(COLOR.iter_unpack(data[start:end]))
+    records = list(RECORD.iter_unpack(data[end:end + n_bricks * RECORD.size]))
+    return palette, records
+
+def compile_file(num):
+    """Compile a level's JSON file to its .bin file, returns the compiled bytes"""
+    with open(source_path(num)) as f:
+        data = compile_level(json.load(f))
+    try:
+        # Unique per writer, tournament workers and prefetch threads may compile the same level at once
+        fd, temp_path = tempfile.mkstemp(prefix=f'level{num}.', suffix='.tmp', dir=LEVEL_DIR)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, compiled_path(num))
+        except OSError:
+            os.unlink(temp_path)
+            raise
+    except OSError:
+        pass  # Read-only install, compile again next time
+    return data
+
+def load_level(num):
+    """Read a compiled level, compiling it first if the JSON file is newer"""
+    source = source_path(num)
+    compiled = compiled_path(num)
+    try:
+        fresh = not os.path.exists(source) or os.path.getmtime(compiled) >= os.path.getmtime(source)
+    except OSError:
+        fresh = False
+    if fresh:
+        try:
+            with open(compiled, 'rb') as f:
+                return read_level(f.read())
+        except ValueError:
+            pass  # Older format, compile again
+    return read_level(compile_file(num))
+
+def build_bricks(level, Brick):
+    """Create the Brick objects of a loaded level"""
+    palette, records = level
+    return [Brick(x, y, width, height, palette[color], points, hits)
+            for x, y, width, height, color, points, hits in records]
+
+class LevelCache:
+    """
+    Process-wide cache of loaded levels.
+    prefetch() loads a level in a background thread, so switching to it
+    later does no file I/O or parsing in the middle of a frame. Levels are
+    immutable palettes and records, only the Brick objects are new each time.
+    Levels are keyed by number, other keys (e.g. generated levels) come with
+    their own load function taking the key. Only numbered levels stay cached;
+    other levels are dropped once get() hands them out, and at most
+    max_generated of them wait unused, the oldest are dropped first.
+    """
+    def __init__(self, max_generated=4):
+        self.max_generated = max_generated
+        self.levels = {}
+        self.loaders = {}
+        self.lock = threading.Lock()
+
+    def prefetch(self, key, load=load_level):
+        """Start loading a level in the background, does nothing if already loaded or loading"""
+        with self.lock:
+            if key in self.levels or key in self.loaders:
+                return
+            loader = threading.Thread(target=self.load, args=(key, load), name=f'level-loader-{key}', daemon=True)
+            self.loaders[key] = loader
+        loader.start()
+
+    def load(self, key, load=load_level):
+        try:
+            level = load(key)
+        except Exception:
+            level = None  # get() loads it again and raises the error there
+        with self.lock:
+            if level is not None:
+                self.levels[key] = level
+                self.trim()
+            del self.loaders[key]
+
+    def trim(self):
+        """Drop the oldest generated levels past max_generated, the lock must be held"""
+        generated = [key for key in self.levels if not isinstance(key, int)]
+        for key in generated[:max(0, len(generated) - self.max_generated)]:
+            del self.levels[key]
+
+    def get(self, key, load=load_level):
+        """The loaded level, waiting for its prefetch or loading it now"""
+        keep = isinstance(key, int)  # Generated levels are used once
+        with self.lock:
+            level = self.levels.get(key) if keep else self.levels.pop(key, None)
+            loader = self.loaders.get(key)
+        if level is None and loader is not None:
+            loader.join()
+            with self.lock:
+                level = self.levels.get(key) if keep else self.levels.pop(key, None)
+        if level is None:
+            # Not prefetched, or the prefetch failed, load here so errors are raised
+            level = load(key)
+            if keep:
+                with self.lock:
+                    self.levels[key] = level
+        return level
+
+level_cache = LevelCache()
+
+if __name__ == "__main__":
+    # Compile every level, e.g. as a build step before packaging
+    for num in range(1, LEVEL_COUNT + 1):
+        try:
+            palette, records = read_level(compile_file(num))
+        except (OSError, ValueError) as e:
+            print(f"level{num}: {e}")
+            sys.exit(1)
+        print(f"level{num}: {len(records)} bricks, {len(palette)} colors -> {compiled_path(num)}")
@@ -1,21 +1,33 @@
+import time
+STARTED = time.perf_counter()  # Startup profile begins before the imports
+
 import pygame
 import sys
-import os
+import argparse
 from pygame.locals import *
-from game_objects import Player, Paddle, Ball, Brick, PowerUp, Laser
-from layouts import create_layout
-from ui import Menu, Button
+from ui import Menu
+from fonts import get_font
 from sound_manager import SoundManager
 from game_manager import GameManager
+from rendering import DirtyRectRenderer
+from profiler import NULL_PROFILER, StartupTimer
+from timestep import FixedTimestep, RenderRate
+
+startup = StartupTimer(STARTED)
+startup.mark('imports')
 
-# Initialize pygame
-pygame.init()
-pygame.mixer.init()
+# Initialize only the display and fonts, the mixer is started after the first frame
+pygame.display.init()
+pygame.font.init()
+startup.mark('pygame init')
 
 # Constants
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 FPS = 60
+TICK_RATES = (30, 60, 120)  # Paddles and lasers still move whole pixels per tick at these rates
+NETPLAY_PORT = 50007  # netplay.DEFAULT_PORT, netplay is only imported for a network match
+NETPLAY_INPUT_DELAY = 2  # netplay.INPUT_DELAY
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 BLUE = (0, 0, 255)
@@ -31,31 +43,134 @@ GAME_OVER = 3
 
 # Main game class
 class Game:
-    def __init__(self):
+    def __init__(self, seed=None, record_path=None, profile=False, profile_out=None,
+                 tick_rate=FPS, render_fps=FPS, adaptive_fps=False, profile_startup=False, connection=None):
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Brick Breaker - Multiplayer")
         self.clock = pygame.time.Clock()
         self.running = True
         self.state = MENU
-        self.font = pygame.font.SysFont('Arial', 24)
-        self.large_font = pygame.font.SysFont('Arial', 36)
+        startup.mark('display')
         
-        # Initialize UI and sound
-        self.menu = Menu(self.screen, self.font, self.large_font)
+        # Font files are looked up once and remembered on disk
+        self.font = get_font('Arial', 24)
+        self.large_font = get_font('Arial', 36)
+        startup.mark('fonts')
+        
+        # Initialize UI and sound, sounds load once the mixer starts
+        self.renderer = DirtyRectRenderer()
+        self.menu = Menu(self.screen, self.font, self.large_font, self.renderer)
         self.sound_manager = SoundManager()
+        startup.mark('menu and sound')
+        
+        # Initialize game manager, one for the whole session sharing the fonts, menu and sound
+        self.game_manager = GameManager(self.screen, renderer=self.renderer, font=self.font,
+                                        large_font=self.large_font, menu=self.menu,
+                                        sound_manager=self.sound_manager)
+        startup.mark('game manager')
+        
+        # Match seed and replay recording
+        self.seed = seed
+        self.record_path = record_path
+        self.recorder = None
+        
+        # Fixed simulation rate, rendering runs at its own rate and interpolates.
+        # A tick moves things by dt 60 Hz frames, so the rate does not change
+        # the game speed. Network players step the same frames, always at FPS.
+        if connection is not None:
+            tick_rate = FPS
+        self.timestep = FixedTimestep(tick_rate)
+        self.dt = FPS // tick_rate if FPS % tick_rate == 0 else FPS / tick_rate
+        self.render_rate = RenderRate((render_fps, max(render_fps // 2, 1)), adaptive=adaptive_fps)
+        self.pending_actions = set()  # Action presses waiting for the next tick
+        
+        # Seconds from a start button click to the first gameplay frame on screen
+        self.start_time = None
+        self.start_latencies = []
         
-        # Initialize game manager
-        self.game_manager = GameManager(self.screen)
+        # Frame profiler, F3 toggles its overlay
+        self.profiler = NULL_PROFILER
+        if profile or profile_out:
+            from profiler import FrameProfiler
+            self.profiler = FrameProfiler()
+        self.profile_out = profile_out
+        self.game_manager.profiler = self.profiler
         
         # Settings
         self.sound_on = True
         self.music_on = True
         
-        # Play menu music
+        # Play menu music, it starts once the sounds are loaded
         self.sound_manager.play_music('menu')
         
+        # Print the time per startup phase and quit once the sounds are loaded
+        self.profile_startup = profile_startup
+        
+        # Network match against another player, it starts right away with the host's seed
+        self.connection = connection
+        self.netplay = None
+        if connection is not None:
+            self.seed = connection.seed
+            self.state = GAME
+            self.new_game()
+        
+    def start_audio(self):
+        """Start the mixer and load the sounds in the background, deferred until the first frame is shown"""
+        try:
+            pygame.mixer.init()
+        except pygame.error as e:
+            print(f"Audio unavailable: {e}")
+            return
+        self.sound_manager.cache.warm_up()
+        startup.mark('mixer init')
+        
+    def new_game(self):
+        self.start_time = time.perf_counter()
+        self.game_manager.reset(self.seed)  # Also starts the gameplay music
+        if self.connection is not None:
+            # Replays are not recorded, the other player's inputs arrive late
+            from netplay import NetSession
+            self.netplay = NetSession(self.connection, self.game_manager)
+            self.game_manager.record_scores = False
+        elif self.record_path:
+            from replay import ReplayRecorder
+            self.recorder = ReplayRecorder(self.game_manager.seed, self.timestep.tick_rate)
+            
+    def end_netplay(self):
+        """Leave the network match, later matches are local"""
+        self.connection.close()
+        self.connection = None
+        self.netplay = None
+        self.game_manager.record_scores = True
+            
+    def save_replay(self):
+        if self.recorder is not None:
+            self.recorder.save(self.record_path)
+            self.recorder = None
+            
+    def save_profile(self):
+        if self.profiler.enabled:
+            print("Timestep:", ", ".join(f"{name} {value}" for name, value in self.timestep.stats().items()))
+            if self.start_latencies:
+                print(f"Click to first frame: {max(self.start_latencies) * 1000:.2f} ms worst, "
+                      f"{sum(self.start_latencies) / len(self.start_latencies) * 1000:.2f} ms average "
+                      f"over {len(self.start_latencies)} matches")
+        if self.profile_out and self.profiler.enabled:
+            self.profiler.export(self.profile_out)
+            
     def run(self):
+        last_state = None
+        first_frame = True
         while self.running:
+            # Every state change starts with a full screen redraw
+            if self.state != last_state:
+                self.renderer.invalidate()
+                self.menu.invalidate()
+                if self.state == GAME:
+                    self.timestep.reset()
+                    self.pending_actions = set()
+                last_state = self.state
+                
             if self.state == MENU:
                 self.menu_loop()
             elif self.state == GAME:
@@ -65,6 +180,16 @@ class Game:
             elif self.state == GAME_OVER:
                 self.game_over_loop()
                 
+            if first_frame:
+                first_frame = False
+                startup.mark('first frame')
+                self.start_audio()
+                if self.profile_startup:
+                    self.sound_manager.cache.wait()
+                    startup.mark('sound loading')
+                    print("\n".join(startup.report_lines()))
+                    self.running = False
+                    
     def menu_loop(self):
         mouse_pos = pygame.mouse.get_pos()
         mouse_clicked = False
@@ -74,16 +199,20 @@ class Game:
                 self.running = False
             elif event.type == MOUSEBUTTONDOWN:
                 mouse_clicked = True
+            elif event.type == MOUSEMOTION:
+                self.menu.handle_mouse_motion(event.pos)
                 
         # Draw menu and get buttons
-        start_button, settings_button, quit_button = self.menu.draw_main_menu(mouse_pos)
+        start_button, settings_button, quit_button = self.menu.draw_main_menu(
+            mouse_pos, self.game_manager.high_scores
+        )
         
         # Check button clicks
         if start_button.is_clicked(mouse_pos, mouse_clicked):
             self.sound_manager.play_sound('menu_select')
             self.state = GAME
-            self.game_manager = GameManager(self.screen)  # Reset game
-            self.sound_manager.play_music('gameplay')
+            self.new_game()  # Reset game
+            return  # Straight on to the first game frame, without waiting for the clock
             
         elif settings_button.is_clicked(mouse_pos, mouse_clicked):
             self.sound_manager.play_sound('menu_select')
@@ -93,43 +222,83 @@ class Game:
             self.sound_manager.play_sound('menu_select')
             self.running = False
             
-        # Draw high scores
-        if hasattr(self.menu, 'draw_high_scores'):
-            self.menu.draw_high_scores(self.game_manager.high_scores)
-        
-        pygame.display.flip()
+        self.renderer.present()
         self.clock.tick(FPS)
         
     def game_loop(self):
+        frame_start = time.perf_counter()
+        self.profiler.begin_frame()
         keys = pygame.key.get_pressed()
+        actions = self.pending_actions
         
         for event in pygame.event.get():
             if event.type == QUIT:
                 self.running = False
             elif event.type == KEYDOWN:
-                if event.key == K_ESCAPE:
-                    self.game_manager.toggle_pause()
+                if event.key == K_ESCAPE and self.netplay is None:
+                    self.game_manager.toggle_pause()  # Pausing would put the other player out of sync
                 elif event.key == K_w:
-                    self.game_manager.handle_action_key(1)
+                    actions.add(1)
                 elif event.key == K_UP:
-                    self.game_manager.handle_action_key(2)
+                    actions.add(2)
+                elif event.key == K_F3:
+                    self.profiler.toggle_overlay()
+                    self.renderer.invalidate()
+            elif event.type == MOUSEMOTION and self.game_manager.paused:
+                self.game_manager.menu.handle_mouse_motion(event.pos)
+        self.profiler.lap('events')
                     
-        # Handle input
-        self.game_manager.handle_input(keys)
+        # Run the simulation ticks due by now (same path as the headless engine).
+        # Action presses are kept until a tick has seen them.
+        ticks = self.timestep.advance()
+        for _ in range(ticks):
+            inputs = self.game_manager.inputs_from_keys(keys, actions)
+            if self.netplay is not None:
+                # Either set of keys moves the local paddle
+                if not self.netplay.advance(tuple(map(any, zip(*inputs)))):
+                    break  # Waiting for the other player's inputs
+                actions = set()
+                continue
+            if self.recorder is not None:
+                self.recorder.record(inputs, self.game_manager.paused)
+            self.game_manager.step(inputs, dt=self.dt)
+            actions = set()
+            if self.game_manager.game_over:
+                break
+        self.pending_actions = actions
+        self.profiler.count('ticks', ticks)
         
-        # Update game state
-        self.game_manager.update()
+        # Draw game between the last two ticks
+        self.game_manager.draw(self.timestep.alpha)
+        overlay = self.profiler.draw_overlay(self.screen, self.font)
+        if overlay is not None:
+            self.renderer.add(overlay)
+        self.profiler.lap('draw')
         
-        # Draw game
-        self.game_manager.draw()
-        
-        # Check for game over
-        if self.game_manager.game_over:
+        if self.netplay is not None and self.netplay.timed_out:
+            print("Connection lost")
+            self.end_netplay()
+            self.state = MENU
+            self.sound_manager.play_music('menu')
+            
+        # Check for game over, in netplay once no late input can undo it
+        if self.game_manager.game_over and (self.netplay is None or self.netplay.settled):
+            if self.netplay is not None:
+                self.netplay.finish(1.0)  # Make sure the other player has our last inputs
+                self.end_netplay()
+                self.game_manager.update_high_scores(max(player.score for player in self.game_manager.players))
             self.state = GAME_OVER
+            self.save_replay()
             self.sound_manager.play_music('menu')
             
-        pygame.display.flip()
-        self.clock.tick(FPS)
+        self.renderer.present()
+        self.profiler.lap('present')
+        self.profiler.end_frame()
+        if self.start_time is not None:
+            self.start_latencies.append(time.perf_counter() - self.start_time)
+            self.start_time = None
+        self.render_rate.record(time.perf_counter() - frame_start)
+        self.clock.tick(self.render_rate.fps)
         
     def settings_loop(self):
         mouse_pos = pygame.mouse.get_pos()
@@ -140,6 +309,8 @@ class Game:
                 self.running = False
             elif event.type == MOUSEBUTTONDOWN:
                 mouse_clicked = True
+            elif event.type == MOUSEMOTION:
+                self.menu.handle_mouse_motion(event.pos)
             elif event.type == KEYDOWN:
                 if event.key == K_ESCAPE:
                     self.state = MENU
@@ -162,7 +333,7 @@ class Game:
             self.sound_manager.play_sound('menu_select')
             self.state = MENU
             
-        pygame.display.flip()
+        self.renderer.present()
         self.clock.tick(FPS)
         
     def game_over_loop(self):
@@ -174,6 +345,8 @@ class Game:
                 self.running = False
             elif event.type == MOUSEBUTTONDOWN:
                 mouse_clicked = True
+            elif event.type == MOUSEMOTION:
+                self.menu.handle_mouse_motion(event.pos)
                 
         # Get player scores
         scores = [self.game_manager.players[0].score, self.game_manager.players[1].score]
@@ -187,8 +360,8 @@ class Game:
         if play_again_button.is_clicked(mouse_pos, mouse_clicked):
             self.sound_manager.play_sound('menu_select')
             self.state = GAME
-            self.game_manager = GameManager(self.screen)  # Reset game
-            self.sound_manager.play_music('gameplay')
+            self.new_game()  # Reset game
+            return  # Straight on to the first game frame, without waiting for the clock
             
         elif main_menu_button.is_clicked(mouse_pos, mouse_clicked):
             self.sound_manager.play_sound('menu_select')
@@ -198,11 +371,46 @@ class Game:
             self.sound_manager.play_sound('menu_select')
             self.running = False
             
-        pygame.display.flip()
+        self.renderer.present()
         self.clock.tick(FPS)
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Brick Breaker - Multiplayer")
+    parser.add_argument('--seed', type=int, help="seed for the match random generator")
+    parser.add_argument('--record', metavar='PATH', help="record each match to a replay file")
+    parser.add_argument('--profile', action='store_true', help="time each frame, F3 toggles the overlay")
+    parser.add_argument('--profile-out', metavar='PATH', help="export frame timings to .csv or Chrome trace .json")
+    parser.add_argument('--tick-rate', type=int, default=FPS, choices=TICK_RATES, help="simulation ticks per second")
+    parser.add_argument('--render-fps', type=int, default=FPS, help="rendered frames per second")
+    parser.add_argument('--adaptive-fps', action='store_true', help="halve the render rate while frames run late")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="print the time spent in each startup phase and quit")
+    parser.add_argument('--host', type=int, nargs='?', const=NETPLAY_PORT, metavar='PORT',
+                        help="wait for a player to join over the network")
+    parser.add_argument('--join', metavar='HOST[:PORT]', help="join a networked match")
+    parser.add_argument('--input-delay', type=int, default=NETPLAY_INPUT_DELAY,
+                        help="frames before an input takes effect in a networked match (host)")
+    args = parser.parse_args()
+    
+    connection = None
+    if args.host is not None or args.join:
+        import netplay
+    if args.host is not None:
+        print(f"Waiting for a player on port {args.host}...")
+        connection = netplay.host(args.host, args.seed, args.input_delay)
+    elif args.join:
+        address, _, port = args.join.partition(':')
+        print(f"Joining {address}...")
+        connection = netplay.join(address, int(port) if port else NETPLAY_PORT, timeout=30)
+        if connection is None:
+            print("No answer from the host")
+            sys.exit(1)
+            
+    game = Game(seed=args.seed, record_path=args.record, profile=args.profile, profile_out=args.profile_out,
+                tick_rate=args.tick_rate, render_fps=args.render_fps, adaptive_fps=args.adaptive_fps,
+                profile_startup=args.profile_startup, connection=connection)
     game.run()
+    game.save_replay()
+    game.save_profile()
     pygame.quit()
     sys.exit()
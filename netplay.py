@@ -0,0 +1,440 @@
+import argparse
+import hashlib
+import heapq
+import json
+import os
+import random
+import socket
+import struct
+import subprocess
+import sys
+import time
+from sound_manager import NullSoundManager
+
+# Constants
+SCREEN_WIDTH = 800
+FPS = 60
+DEFAULT_PORT = 50007
+INPUT_DELAY = 2  # Frames between a key press and its effect, hides part of the latency
+MAX_ROLLBACK = 8  # Frames the simulation may run ahead of the other player's inputs
+SEND_EVERY = 2  # Frames between input packets, each packet repeats every unacknowledged input
+MAX_INPUTS = 64  # Inputs per packet
+MAX_PACKET = 512
+UDP_OVERHEAD = 28  # IPv4 and UDP header bytes, counted in the bandwidth figures
+MAX_BANDWIDTH = 2048  # Bytes per second each player may send, checked by the loopback test
+HANDSHAKE_RESEND = 0.2  # Seconds between HELLO packets while joining
+PEER_TIMEOUT = 5.0  # Seconds without a packet before the other player counts as gone
+
+# Packet types
+HELLO = 1  # Joiner to host until welcomed
+WELCOME = 2  # Host to joiner: match seed and input delay
+INPUTS = 3  # Inputs of the sender's player
+
+WELCOME_PACKET = struct.Struct('<BQB')  # Type, match seed, input delay
+INPUTS_HEADER = struct.Struct('<BIIB')  # Type, next frame wanted from the receiver, first frame, count
+
+# Bits of one player's input byte
+LEFT = 1
+RIGHT = 2
+ACTION = 4
+
+def encode_input(player_input):
+    left, right, action = player_input
+    return (LEFT if left else 0) | (RIGHT if right else 0) | (ACTION if action else 0)
+
+def decode_input(value):
+    return (bool(value & LEFT), bool(value & RIGHT), bool(value & ACTION))
+
+class LossySocket:
+    """
+    UDP socket that drops and delays outgoing packets, for testing over loopback.
+    Delayed packets are sent by the next sendto() or recvfrom() once due, so
+    with jitter they can also arrive out of order.
+    """
+    def __init__(self, sock, loss=0.0, latency=0.0, jitter=0.0, seed=None):
+        self.sock = sock
+        self.loss = loss
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.pending = []  # (due time, sequence, data, address)
+        self.sequence = 0
+
+    def sendto(self, data, address):
+        if self.rng.random() >= self.loss:
+            due = time.perf_counter() + self.latency + self.rng.uniform(0, self.jitter)
+            heapq.heappush(self.pending, (due, self.sequence, data, address))
+            self.sequence += 1
+        self.flush()
+        return len(data)
+
+    def flush(self):
+        now = time.perf_counter()
+        while self.pending and self.pending[0][0] <= now:
+            _, _, data, address = heapq.heappop(self.pending)
+            self.sock.sendto(data, address)
+
+    def recvfrom(self, size):
+        self.flush()
+        return self.sock.recvfrom(size)
+
+    def settimeout(self, timeout):
+        self.sock.settimeout(timeout)
+
+    def close(self):
+        self.sock.close()
+
+class Connection:
+    """UDP link to the other player after the handshake"""
+    def __init__(self, sock, peer, seed, local_player, input_delay):
+        self.sock = sock
+        self.peer = peer
+        self.seed = seed
+        self.local_player = local_player  # 0 for the host, 1 for the joiner
+        self.input_delay = input_delay
+
+    def close(self):
+        self.sock.close()
+
+def host(port=DEFAULT_PORT, seed=None, input_delay=INPUT_DELAY, loss=0.0, latency=0.0, jitter=0.0, timeout=None):
+    """Wait for a player to join, the host plays player 1. Returns a Connection, or None on timeout"""
+    raw = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    raw.bind(('', port))
+    sock = LossySocket(raw, loss, latency, jitter)
+    seed = seed if seed is not None else random.randrange(2**32)
+    deadline = None if timeout is None else time.perf_counter() + timeout
+
+    while deadline is None or time.perf_counter() < deadline:
+        sock.settimeout(HANDSHAKE_RESEND)
+        try:
+            data, peer = sock.recvfrom(MAX_PACKET)
+        except socket.timeout:
+            continue
+        if data[:1] == bytes([HELLO]):
+            sock.sendto(WELCOME_PACKET.pack(WELCOME, seed, input_delay), peer)
+            sock.settimeout(0)
+            return Connection(sock, peer, seed, 0, input_delay)
+    sock.close()
+    return None
+
+def join(address, port=DEFAULT_PORT, loss=0.0, latency=0.0, jitter=0.0, timeout=None):
+    """Join a host, the joiner plays player 2. Returns a Connection, or None on timeout"""
+    raw = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    raw.bind(('', 0))
+    sock = LossySocket(raw, loss, latency, jitter)
+    peer = (socket.gethostbyname(address), port)
+    deadline = None if timeout is None else time.perf_counter() + timeout
+
+    while deadline is None or time.perf_counter() < deadline:
+        sock.sendto(bytes([HELLO]), peer)
+        sock.settimeout(HANDSHAKE_RESEND)
+        try:
+            data, sender = sock.recvfrom(MAX_PACKET)
+        except (socket.timeout, ConnectionResetError):
+            continue  # Windows reports an unreachable port as a reset
+        if sender == peer and len(data) == WELCOME_PACKET.size and data[0] == WELCOME:
+            _, seed, input_delay = WELCOME_PACKET.unpack(data)
+            sock.settimeout(0)
+            return Connection(sock, peer, seed, 1, input_delay)
+    sock.close()
+    return None
+
+class NetSession:
+    """
+    Delay-based lockstep with rollback over a Connection.
+    Only inputs go over the network. Each frame the local player's input is
+    scheduled input_delay frames ahead and sent to the other player, every
+    packet repeating the inputs they have not acknowledged, so lost packets
+    need no resend. When the other player's input for a frame is not in yet
+    it is predicted (their last input, without the action press) and the
+    game goes on. If the real input differs, the game is restored to the
+    state saved before that frame and simulated again up to the present.
+    The simulation waits when it is more than max_rollback frames ahead of
+    the other player's inputs.
+    """
+    def __init__(self, connection, game, max_rollback=MAX_ROLLBACK, send_every=SEND_EVERY):
+        self.connection = connection
+        self.game = game
+        self.local = connection.local_player
+        self.remote = 1 - self.local
+        self.input_delay = connection.input_delay
+        self.max_rollback = max_rollback
+        self.send_interval = send_every / FPS
+
+        # Per player: frame -> input byte. The first frames have no input.
+        self.inputs = ({}, {})
+        for frame in range(self.input_delay):
+            self.inputs[0][frame] = 0
+            self.inputs[1][frame] = 0
+        self.predicted = {}  # Frame -> remote input the simulation guessed, until the real one comes
+        self.states = {}  # Frame -> game state saved before simulating it
+        self.frame = 0  # Next frame to simulate
+        self.remote_confirmed = self.input_delay - 1  # Remote inputs are known up to this frame
+        self.remote_wants = 0  # First local input the other player has not received
+        self.last_send = 0.0
+        self.last_received = time.perf_counter()
+
+        # Statistics
+        self.rollbacks = 0
+        self.rollback_frames = 0
+        self.stalls = 0
+        self.packets_sent = 0
+        self.packets_received = 0
+        self.bytes_sent = 0
+        self.start_time = time.perf_counter()
+
+    def advance(self, local_input):
+        """
+        Run the next frame with the local player's (left, right, action) input.
+        Returns False without simulating while waiting for the other player.
+        """
+        self.poll()
+        scheduled = self.frame + self.input_delay
+        if scheduled not in self.inputs[self.local]:
+            self.inputs[self.local][scheduled] = encode_input(local_input)
+
+        if self.frame > self.remote_confirmed + self.max_rollback:
+            self.stalls += 1
+            ran = False
+        else:
+            self.simulate()
+            ran = True
+        if time.perf_counter() - self.last_send >= self.send_interval:
+            self.send()
+        return ran
+
+    def simulate(self):
+        frame = self.frame
+        self.states[frame] = self.game.save_state()
+        remote_input = self.inputs[self.remote].get(frame)
+        if remote_input is None:
+            remote_input = self.inputs[self.remote][self.remote_confirmed] & ~ACTION
+            self.predicted[frame] = remote_input
+        inputs = [None, None]
+        inputs[self.local] = decode_input(self.inputs[self.local][frame])
+        inputs[self.remote] = decode_input(remote_input)
+        self.game.step(inputs)
+        self.frame += 1
+
+    def rollback(self, frame):
+        """Restore the state before frame and simulate again up to the present"""
+        end = self.frame
+        self.rollbacks += 1
+        self.rollback_frames += end - frame
+        self.game.load_state(self.states[frame])
+        self.frame = frame
+
+        # The sounds of these frames have already been played
+        sound_manager = self.game.sound_manager
+        self.game.sound_manager = NullSoundManager()
+        try:
+            while self.frame < end:
+                self.simulate()
+        finally:
+            self.game.sound_manager = sound_manager
+
+    def poll(self):
+        """Handle every packet waiting on the socket"""
+        rollback_to = None
+        while True:
+            try:
+                data, address = self.connection.sock.recvfrom(MAX_PACKET)
+            except (BlockingIOError, socket.timeout):
+                break
+            except ConnectionResetError:
+                continue  # Windows reports an unreachable port as a reset
+            if address != self.connection.peer or not data:
+                continue
+            self.packets_received += 1
+            self.last_received = time.perf_counter()
+
+            if data[0] == HELLO and self.local == 0:
+                # Our WELCOME was lost
+                self.connection.sock.sendto(
+                    WELCOME_PACKET.pack(WELCOME, self.connection.seed, self.input_delay), address)
+            elif data[0] == INPUTS and len(data) >= INPUTS_HEADER.size:
+                _, wants, first, count = INPUTS_HEADER.unpack_from(data)
+                self.remote_wants = max(self.remote_wants, wants)
+                remote_inputs = self.inputs[self.remote]
+                for frame, value in enumerate(data[INPUTS_HEADER.size:INPUTS_HEADER.size + count], first):
+                    if frame <= self.remote_confirmed or frame in remote_inputs:
+                        continue
+                    remote_inputs[frame] = value
+                    predicted = self.predicted.pop(frame, None)
+                    if predicted is not None and predicted != value and (rollback_to is None or frame < rollback_to):
+                        rollback_to = frame
+                while self.remote_confirmed + 1 in remote_inputs:
+                    self.remote_confirmed += 1
+
+        if rollback_to is not None:
+            self.rollback(rollback_to)
+        self.forget()
+
+    def forget(self):
+        """Drop states and inputs that cannot be needed again"""
+        oldest = self.remote_confirmed + 1  # Earliest frame a rollback can go back to
+        for frame in [frame for frame in self.states if frame < oldest]:
+            del self.states[frame]
+        # The other player may be ahead, inputs of frames not simulated yet are kept
+        keep_remote = min(self.remote_confirmed, self.frame)  # The last confirmed input is used for predictions
+        for frame in [frame for frame in self.inputs[self.remote] if frame < keep_remote]:
+            del self.inputs[self.remote][frame]
+        keep_local = min(oldest, self.remote_wants, self.frame)
+        for frame in [frame for frame in self.inputs[self.local] if frame < keep_local]:
+            del self.inputs[self.local][frame]
+
+    def send(self):
+        """Send the unacknowledged local inputs and which remote input we need next"""
+        first = self.remote_wants
+        last = min(self.frame + self.input_delay, first + MAX_INPUTS - 1)
+        values = bytes(self.inputs[self.local][frame] for frame in range(first, last + 1)
+                       if frame in self.inputs[self.local])
+        packet = INPUTS_HEADER.pack(INPUTS, self.remote_confirmed + 1, first, len(values)) + values
+        self.connection.sock.sendto(packet, self.connection.peer)
+        self.last_send = time.perf_counter()
+        self.packets_sent += 1
+        self.bytes_sent += len(packet) + UDP_OVERHEAD
+
+    @property
+    def settled(self):
+        """True when every simulated frame used real inputs, so no rollback can change it"""
+        return self.remote_confirmed >= self.frame - 1
+
+    @property
+    def timed_out(self):
+        return time.perf_counter() - self.last_received > PEER_TIMEOUT
+
+    def finish(self, timeout=2.0):
+        """
+        Keep exchanging packets until the simulated frames are settled and the
+        other player has all our inputs for them. Returns False on timeout.
+        """
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            self.poll()
+            self.send()
+            if self.settled and self.remote_wants >= self.frame:
+                # A few more packets so the other player also learns it has everything
+                for _ in range(5):
+                    time.sleep(0.01)
+                    self.poll()
+                    self.send()
+                return True
+            time.sleep(0.005)
+        return False
+
+    def stats(self):
+        seconds = max(time.perf_counter() - self.start_time, 1e-9)
+        return {
+            'frames': self.frame,
+            'rollbacks': self.rollbacks,
+            'rollback_frames': self.rollback_frames,
+            'stalls': self.stalls,
+            'packets_sent': self.packets_sent,
+            'packets_received': self.packets_received,
+            'bytes_per_second': round(self.bytes_sent / seconds, 1),
+        }
+
+def state_digest(game):
+    """Hash of the simulation state, equal on both machines when the match is in sync"""
+    return hashlib.sha256(game.save_state()).hexdigest()
+
+def scripted_input(game, player, frame):
+    """Test input: follow the lowest ball on the player's half, press action every 1.5 seconds"""
+    paddle = game.players[player].paddle
+    half = [ball for ball in game.balls if (ball.pos.x < SCREEN_WIDTH // 2) == (player == 0)]
+    target = max(half, key=lambda ball: ball.pos.y).pos.x if half else paddle.rect.centerx
+    # Aim off-center by a varying amount so the ball does not bounce straight up forever
+    target += (frame // 120 % 5 - 2) * 12
+    return (target < paddle.rect.centerx - 4, target > paddle.rect.centerx + 4, frame % 90 == 0)
+
+def run_scripted(connection, frames):
+    """
+    Play frames with scripted input at FPS.
+    Returns (digest, stats, inputs), inputs holding the local player's input
+    byte of every frame as hex, for comparing with an offline run.
+    """
+    from game_manager import GameManager
+    game = GameManager(headless=True, seed=connection.seed)
+    session = NetSession(connection, game)
+    sent = bytearray(session.input_delay)
+    next_frame = time.perf_counter()
+    while session.frame < frames:
+        session.advance(scripted_input(game, session.local, session.frame))
+        # While stalled the input of the scheduled frame stays the one given first
+        scheduled = session.frame + session.input_delay - 1
+        if scheduled >= len(sent) and scheduled in session.inputs[session.local]:
+            sent.append(session.inputs[session.local][scheduled])
+        next_frame += 1 / FPS
+        time.sleep(max(0.0, next_frame - time.perf_counter()))
+    session.finish()
+    return state_digest(game), session.stats(), sent[:frames].hex()
+
+def run_offline(seed, frames, inputs):
+    """Replay a match from each player's input bytes without a network, returns (digest, frames simulated)"""
+    from game_manager import GameManager
+    game = GameManager(headless=True, seed=seed)
+    for frame in range(frames):
+        game.step([decode_input(player_inputs[frame]) for player_inputs in inputs])
+    return state_digest(game), game.frame
+
+if __name__ == "__main__":
+    # The test players run without a window or sound card
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+    parser = argparse.ArgumentParser(description="Netplay over UDP, or a loopback test with two local processes")
+    parser.add_argument('mode', choices=('loopback', 'host', 'join'),
+                        help="loopback starts a host and a joiner process and compares their final states")
+    parser.add_argument('--address', default='127.0.0.1', help="host to join")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--frames', type=int, default=600, help="frames to play")
+    parser.add_argument('--seed', type=int, default=1, help="match seed (host)")
+    parser.add_argument('--input-delay', type=int, default=INPUT_DELAY, help="input delay in frames (host)")
+    parser.add_argument('--loss', type=float, default=0.0, help="share of outgoing packets dropped")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every outgoing packet")
+    parser.add_argument('--jitter', type=float, default=0.0, help="random extra seconds per packet")
+    args = parser.parse_args()
+
+    if args.mode == 'loopback':
+        common = ['--port', str(args.port), '--frames', str(args.frames), '--loss', str(args.loss),
+                  '--latency', str(args.latency), '--jitter', str(args.jitter)]
+        host_process = subprocess.Popen(
+            [sys.executable, __file__, 'host', '--seed', str(args.seed), '--input-delay', str(args.input_delay)] + common,
+            stdout=subprocess.PIPE, text=True)
+        time.sleep(0.5)  # Let the host bind its port
+        join_process = subprocess.Popen([sys.executable, __file__, 'join', '--address', args.address] + common,
+                                        stdout=subprocess.PIPE, text=True)
+        results = []
+        for process in (host_process, join_process):
+            output = process.communicate(timeout=args.frames / FPS * 4 + 60)[0].strip().splitlines()
+            if process.returncode != 0 or not output:
+                print(f"Player process failed with exit code {process.returncode}")
+                sys.exit(1)
+            results.append(json.loads(output[-1]))
+        expected, game_frames = run_offline(args.seed, args.frames, [bytes.fromhex(result['inputs']) for result in results])
+
+        for name, result in zip(('host', 'join'), results):
+            print(f"{name}: {result['digest'][:16]} " + ", ".join(f"{key} {value}" for key, value in result['stats'].items()))
+        print(f"offline: {expected[:16]}" + (f", game over after {game_frames} frames" if game_frames < args.frames else ""))
+        failed = False
+        if not all(result['digest'] == expected for result in results):
+            print("DESYNC: the final states differ")
+            failed = True
+        if any(result['stats']['bytes_per_second'] > MAX_BANDWIDTH for result in results):
+            print(f"Over the bandwidth budget of {MAX_BANDWIDTH} bytes/s per player")
+            failed = True
+        if failed:
+            sys.exit(1)
+        print("In sync")
+    else:
+        if args.mode == 'host':
+            connection = host(args.port, args.seed, args.input_delay, args.loss, args.latency, args.jitter, timeout=30)
+        else:
+            connection = join(args.address, args.port, args.loss, args.latency, args.jitter, timeout=30)
+        if connection is None:
+            print("No connection")
+            sys.exit(1)
+        digest, stats, inputs = run_scripted(connection, args.frames)
+        connection.close()
+        print(json.dumps({'digest': digest, 'stats': stats, 'inputs': inputs}))
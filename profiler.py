@@ -0,0 +1,196 @@
+import json
+import time
+from collections import deque
+from ui import text_cache
+
+# Constants
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+
+class FrameProfiler:
+    """
+    Times the phases of each frame.
+    Call begin_frame() at the start of a frame, lap(phase) at the end of each
+    phase and end_frame() when the frame is done. Phase times are kept for a
+    rolling window of frames for percentiles, and as trace events for export.
+    """
+    enabled = True
+
+    def __init__(self, window=240, max_events=200000):
+        self.window = deque(maxlen=window)  # One {phase: ms} dict per frame
+        self.events = deque(maxlen=max_events)  # (frame, phase, start, end) in seconds
+        self.counters = deque(maxlen=max_events)  # (frame, name, value)
+        self.phases = []  # Phase names in first seen order
+        self.frame = 0
+        self.current = {}
+        self.counts = {}
+        self.last = None
+        self.show_overlay = True
+        self.overlay_lines = []
+        self.origin = time.perf_counter()
+
+    def begin_frame(self):
+        self.frame += 1
+        self.current = {}
+        self.counts = {}
+        self.last = time.perf_counter()
+
+    def lap(self, phase):
+        """Close the current phase, the time since the previous lap is charged to it"""
+        if self.last is None:
+            return
+        now = time.perf_counter()
+        if phase not in self.current:
+            self.current[phase] = 0.0
+            if phase not in self.phases:
+                self.phases.append(phase)
+        self.current[phase] += (now - self.last) * 1000
+        self.events.append((self.frame, phase, self.last, now))
+        self.last = now
+
+    def count(self, name, value=1):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def end_frame(self):
+        if self.last is None:
+            return
+        self.current['frame'] = sum(self.current.values())
+        self.current.update(self.counts)
+        self.window.append(self.current)
+        for name, value in self.counts.items():
+            self.counters.append((self.frame, name, value))
+        self.last = None
+
+        # Refresh the overlay text twice a second
+        if self.frame % 30 == 0:
+            self.overlay_lines = self.report_lines()
+
+    def percentiles(self, name, points=(50, 95, 99)):
+        values = sorted(frame.get(name, 0) for frame in self.window)
+        if not values:
+            return [0.0 for _ in points]
+        return [values[min(len(values) - 1, len(values) * point // 100)] for point in points]
+
+    def report_lines(self):
+        lines = [f"{'phase':<16}{'p50':>8}{'p95':>8}{'p99':>8}"]
+        names = self.phases + ['frame'] + sorted({name for frame in self.window for name in frame} - set(self.phases) - {'frame'})
+        for name in names:
+            p50, p95, p99 = self.percentiles(name)
+            if name in self.phases or name == 'frame':
+                lines.append(f"{name:<16}{p50:>8.2f}{p95:>8.2f}{p99:>8.2f}")
+            else:
+                lines.append(f"{name:<16}{p50:>8}{p95:>8}{p99:>8}")
+        return lines
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+
+    def draw_overlay(self, screen, font, pos=(10, 60)):
+        """Draw the rolling percentiles (ms) on screen, returns the area drawn"""
+        if not self.show_overlay or not self.overlay_lines:
+            return None
+        line_height = font.get_linesize()
+        surfaces = [text_cache.render(font, line, True, WHITE) for line in self.overlay_lines]
+        area = (pos[0], pos[1], max(surface.get_width() for surface in surfaces), line_height * len(surfaces))
+        screen.fill(BLACK, area)
+        for i, surface in enumerate(surfaces):
+            screen.blit(surface, (pos[0], pos[1] + i * line_height))
+        return area
+
+    def export_csv(self, path):
+        """One row per frame with the time of each phase in ms and the counters"""
+        names = self.phases + ['frame']
+        counter_names = sorted({name for _, name, _ in self.counters})
+        rows = {}
+        for frame, phase, start, end in self.events:
+            row = rows.setdefault(frame, {})
+            row[phase] = row.get(phase, 0.0) + (end - start) * 1000
+        for frame, name, value in self.counters:
+            rows.setdefault(frame, {})[name] = value
+
+        import csv  # Only needed for --profile-out
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame_number'] + names + counter_names)
+            for frame in sorted(rows):
+                row = rows[frame]
+                row['frame'] = sum(row.get(phase, 0.0) for phase in self.phases)
+                writer.writerow([frame] + [f"{row.get(name, 0.0):.4f}" for name in names] +
+                                [row.get(name, 0) for name in counter_names])
+
+    def export_chrome_trace(self, path):
+        """Write the events in Chrome trace format (chrome://tracing, Perfetto)"""
+        trace = []
+        for frame, phase, start, end in self.events:
+            trace.append({
+                'name': phase,
+                'ph': 'X',
+                'ts': (start - self.origin) * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': 1,
+                'tid': 1,
+                'args': {'frame': frame},
+            })
+        frame_starts = {}
+        for frame, phase, start, end in self.events:
+            frame_starts.setdefault(frame, start)
+        for frame, name, value in self.counters:
+            if frame in frame_starts:
+                trace.append({
+                    'name': name,
+                    'ph': 'C',
+                    'ts': (frame_starts[frame] - self.origin) * 1e6,
+                    'pid': 1,
+                    'args': {name: value},
+                })
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+
+    def export(self, path):
+        """Export as CSV or Chrome trace JSON depending on the file extension"""
+        if path.endswith('.json'):
+            self.export_chrome_trace(path)
+        else:
+            self.export_csv(path)
+
+class NullProfiler:
+    """Profiler that does nothing, used when profiling is off"""
+    enabled = False
+
+    def begin_frame(self):
+        pass
+
+    def lap(self, phase):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def toggle_overlay(self):
+        pass
+
+    def draw_overlay(self, screen, font, pos=(10, 60)):
+        return None
+
+NULL_PROFILER = NullProfiler()
+
+class StartupTimer:
+    """Time spent in each startup phase, from the start of main.py to the first frame and beyond"""
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.last = self.start
+        self.phases = []  # (phase, seconds)
+
+    def mark(self, phase):
+        """End the current phase"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report_lines(self):
+        lines = [f"{phase:<20}{seconds * 1000:>9.2f} ms" for phase, seconds in self.phases]
+        lines.append(f"{'total':<20}{(self.last - self.start) * 1000:>9.2f} ms")
+        return lines
@@ -0,0 +1,70 @@
+import pygame
+
+# Constants
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+BLACK = (0, 0, 0)
+
+class BrickLayer:
+    """
+    Offscreen surface holding the whole brick field.
+    It is drawn once per layout and blitted in a single call every frame.
+    Black is the transparent color key, so anything under the bricks shows through.
+    """
+    def __init__(self, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.surface = pygame.Surface((width, height))
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert()
+        self.surface.set_colorkey(BLACK)
+
+    def build(self, bricks):
+        """Render a new layout"""
+        self.surface.fill(BLACK)
+        for brick in bricks:
+            brick.draw(self.surface)
+
+    def remove(self, brick, neighbours):
+        """
+        Clear a destroyed brick and redraw the parts of overlapping bricks it covered.
+        neighbours must be the remaining bricks near it, in drawing order.
+        """
+        self.surface.fill(BLACK, brick.rect)
+        for other in neighbours:
+            if other.rect.colliderect(brick.rect):
+                pygame.draw.rect(self.surface, other.color, other.rect.clip(brick.rect))
+
+    def draw(self, screen):
+        screen.blit(self.surface, (0, 0))
+
+class DirtyRectRenderer:
+    """
+    Presents only the screen regions that changed since the last frame.
+    Each frame the regions drawn this frame are updated together with the
+    ones from the previous frame, so moved objects are erased at their old
+    position. invalidate() falls back to a full display.flip() for one frame.
+    """
+    MAX_RECTS = 64  # Above this many regions a single bounding rect is cheaper
+
+    def __init__(self):
+        self.rects = []
+        self.previous = []
+        self.full_redraw = True
+
+    def add(self, rect):
+        self.rects.append(pygame.Rect(rect))
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def present(self):
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            rects = self.previous + self.rects
+            if len(rects) > self.MAX_RECTS:
+                rects = [rects[0].unionall(rects[1:])]
+            if rects:
+                pygame.display.update(rects)
+        self.previous = self.rects
+        self.rects = []
@@ -0,0 +1,149 @@
+import struct
+import sys
+from game_manager import GameManager, FPS
+
+# Replay file layout:
+#   header: magic, format version, match seed, number of frames, ticks per second
+#   body:   run-length encoded frame states, each run is one state byte
+#           followed by the run length as a little-endian base-128 varint
+MAGIC = b'BBRP'
+VERSION = 2
+HEADER = struct.Struct('<4sBQIH')
+V1_HEADER = struct.Struct('<4sBQI')  # Version 1 has no tick rate, it was always FPS
+
+# Bits of a frame state byte
+P1_LEFT = 1
+P1_RIGHT = 2
+P1_ACTION = 4
+P2_LEFT = 8
+P2_RIGHT = 16
+P2_ACTION = 32
+PAUSED = 64
+
+def encode_frame(inputs, paused=False):
+    """Pack both players' (left, right, action) inputs and the pause flag into one byte"""
+    state = PAUSED if paused else 0
+    for shift, (left, right, action) in zip((0, 3), inputs):
+        if left:
+            state |= P1_LEFT << shift
+        if right:
+            state |= P1_RIGHT << shift
+        if action:
+            state |= P1_ACTION << shift
+    return state
+
+def decode_frame(state):
+    """Inverse of encode_frame, returns (inputs, paused)"""
+    inputs = tuple(
+        (bool(state & (P1_LEFT << shift)), bool(state & (P1_RIGHT << shift)), bool(state & (P1_ACTION << shift)))
+        for shift in (0, 3)
+    )
+    return inputs, bool(state & PAUSED)
+
+class ReplayRecorder:
+    """Records the seed, tick rate and per-frame key state of a match"""
+    def __init__(self, seed, tick_rate=FPS):
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.frames = 0
+        self.runs = []  # [state, count] pairs
+
+    def record(self, inputs, paused=False):
+        state = encode_frame(inputs, paused)
+        if self.runs and self.runs[-1][0] == state:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([state, 1])
+        self.frames += 1
+
+    def to_bytes(self):
+        data = bytearray(HEADER.pack(MAGIC, VERSION, self.seed, self.frames, self.tick_rate))
+        for state, count in self.runs:
+            data.append(state)
+            while count >= 0x80:
+                data.append((count & 0x7F) | 0x80)
+                count >>= 7
+            data.append(count)
+        return bytes(data)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+def read_header(data):
+    """Returns (seed, frame_count, tick_rate, header size) of replay bytes"""
+    if len(data) < V1_HEADER.size:
+        raise ValueError("Replay data is truncated")
+    magic, version, seed, frame_count = V1_HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a replay file")
+    if version == 1:
+        return seed, frame_count, FPS, V1_HEADER.size
+    if version != VERSION:
+        raise ValueError(f"Unsupported replay version: {version}")
+    if len(data) < HEADER.size:
+        raise ValueError("Replay data is truncated")
+    return seed, frame_count, HEADER.unpack_from(data)[4], HEADER.size
+
+def load_replay(data):
+    """
+    Parse replay bytes, returns (seed, frame_count, runs) where runs is a
+    list of (state, count) pairs
+    """
+    seed, frame_count, _, i = read_header(data)
+    runs = []
+    total = 0
+    while i < len(data):
+        state = data[i]
+        i += 1
+        count = 0
+        shift = 0
+        while True:
+            if i >= len(data):
+                raise ValueError("Replay data is truncated")
+            byte = data[i]
+            i += 1
+            count |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        runs.append((state, count))
+        total += count
+
+    if total != frame_count:
+        raise ValueError("Replay frame count does not match its header")
+    return seed, frame_count, runs
+
+def play_replay(data):
+    """Re-simulate a recorded match headlessly at full speed, returns the GameManager"""
+    seed, frame_count, runs = load_replay(data)
+    tick_rate = read_header(data)[2]
+    # Each recorded tick moves things by dt 60 Hz frames
+    dt = FPS // tick_rate if FPS % tick_rate == 0 else FPS / tick_rate
+    game = GameManager(headless=True, seed=seed)
+    for state, count in runs:
+        inputs, paused = decode_frame(state)
+        game.paused = paused
+        if inputs[0][2] or inputs[1][2]:
+            # Action presses only fire on the first frame of a step, so
+            # a run of presses is replayed one frame at a time
+            for _ in range(count):
+                game.step(inputs, dt=dt)
+        else:
+            game.step(inputs, count, dt)
+    return game
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python replay.py <replay file>")
+        sys.exit(1)
+
+    with open(sys.argv[1], 'rb') as f:
+        game = play_replay(f.read())
+
+    scores = [player.score for player in game.players]
+    lives = [player.lives for player in game.players]
+    print(f"Seed: {game.seed}  Frames: {game.frame}")
+    print(f"Scores: {scores[0]} - {scores[1]}  Lives: {lives[0]} - {lives[1]}")
+    if game.game_over:
+        print(f"Player {game.winner} Wins!")
@@ -0,0 +1,230 @@
+import random
+import struct
+from array import array
+import pygame
+from game_objects import Ball, PowerUp, Laser, WHITE
+
+# Snapshot format: header, both players, RNG state, brick states, then the
+# balls, powerups and lasers. Bricks come before the variable length parts so
+# a delta can find its base's brick states at a fixed offset.
+MAGIC = b'BBSS'
+VERSION = 2
+FULL = 0
+DELTA = 1  # Only the bricks that differ from a full base snapshot
+
+HEADER = struct.Struct('<4sBBqI?HBBBHHHH')  # Magic, version, kind, match seed, frame, endless, layout, game over,
+                                            # winner, paused, ball, powerup, laser and brick entry counts
+PLAYER = struct.Struct('<ib6h??')  # Score, lives, paddle x y width height, previous x, laser cooldown, sticky, laser
+RNG = struct.Struct('<?d625I')  # Has a cached gauss value, the value, Mersenne Twister state and position
+BALL = struct.Struct('<7dbBd')  # x, y, previous x y, velocity x y, attach offset, paddle index or -1, radius, speed
+POWERUP = struct.Struct('<3dB')  # x, y, previous y, type
+LASER = struct.Struct('<3i')  # x, y, previous y
+
+BRICKS_OFFSET = HEADER.size + 2 * PLAYER.size + RNG.size
+DEAD = 0xFF  # Brick state of a destroyed brick, otherwise its hit count
+
+class TrackedRandom(random.Random):
+    """
+    random.Random that counts the calls changing its state, so a snapshot
+    can reuse the packed state (2.5 KB, half the cost of a snapshot) while
+    nothing was drawn. Draws the same numbers as random.Random; getrandbits
+    has to be defined before random for randrange to keep using it.
+    """
+    changes = 0
+    packed = None  # Packed state and the change count it was packed at
+    packed_at = -1
+
+    def getrandbits(self, k):
+        self.changes += 1
+        return super().getrandbits(k)
+
+    def random(self):
+        self.changes += 1
+        return super().random()
+
+    def gauss(self, mu=0.0, sigma=1.0):
+        self.changes += 1
+        return super().gauss(mu, sigma)
+
+    def seed(self, *args, **kwargs):
+        self.changes += 1
+        super().seed(*args, **kwargs)
+
+    def setstate(self, state):
+        self.changes += 1
+        super().setstate(state)
+
+def pack_rng(rng):
+    """RNG state as bytes, a TrackedRandom keeps them until its state changes"""
+    tracked = isinstance(rng, TrackedRandom)
+    if tracked and rng.packed_at == rng.changes:
+        return rng.packed
+    _, words, gauss = rng.getstate()
+    data = RNG.pack(gauss is not None, gauss or 0.0, *words)
+    if tracked:
+        rng.packed = data
+        rng.packed_at = rng.changes
+    return data
+
+def full_layout(data):
+    """(seed, layout) of a full snapshot, None for a delta; deltas only apply to the same layout"""
+    _, _, kind, seed, _, _, layout = HEADER.unpack_from(data)[:7]
+    return (seed, layout) if kind == FULL else None
+
+def brick_states(game):
+    """One byte per brick of the layout, in its original order"""
+    states = bytearray(b'\xff') * len(game.brick_grid.layout)
+    for brick, position in game.brick_grid.order.items():
+        states[position] = brick.hits
+    return states
+
+def take(game, base=None):
+    """
+    Snapshot of the simulation state as bytes.
+    With a full snapshot of the same layout as base, only the bricks that
+    changed since base are stored and base is needed to restore it.
+    Display, sound and high scores are not part of the state.
+    """
+    players = game.players
+    bricks = brick_states(game)
+    kind = FULL
+    if base is not None and full_layout(base) == (game.seed, game.current_layout):
+        base_bricks = base[BRICKS_OFFSET:BRICKS_OFFSET + len(bricks)]
+        changed = [i for i, (state, base_state) in enumerate(zip(bricks, base_bricks)) if state != base_state]
+        bricks = array('H', changed).tobytes() + bytes(bricks[i] for i in changed)
+        kind = DELTA
+        brick_entries = len(changed)
+    else:
+        brick_entries = len(bricks)
+
+    parts = [
+        HEADER.pack(MAGIC, VERSION, kind, game.seed, game.frame, game.endless, game.current_layout, game.game_over,
+                    game.winner, game.paused, len(game.balls), len(game.powerups), len(game.lasers), brick_entries),
+    ]
+    for player in players:
+        paddle = player.paddle
+        rect = paddle.rect
+        parts.append(PLAYER.pack(player.score, player.lives, rect.x, rect.y, rect.width, rect.height,
+                                 paddle.prev_x, paddle.laser_cooldown, paddle.sticky, paddle.laser_active))
+    parts.append(pack_rng(game.rng))
+    parts.append(bytes(bricks))
+
+    paddles = [player.paddle for player in players]
+    for ball in game.balls:
+        attached = paddles.index(ball.attached_to) if ball.attached_to is not None else -1
+        parts.append(BALL.pack(ball.pos.x, ball.pos.y, ball.prev.x, ball.prev.y, ball.velocity.x, ball.velocity.y,
+                               ball.attach_offset, attached, ball.radius, ball.speed))
+    for powerup in game.powerups:
+        parts.append(POWERUP.pack(powerup.pos.x, powerup.pos.y, powerup.prev_y, powerup.type))
+    for laser in game.lasers:
+        parts.append(LASER.pack(laser.rect.centerx, laser.rect.y, laser.prev_y))
+    return b''.join(parts)
+
+def restore(game, data, base=None):
+    """Put the game into the state of a snapshot from take(), base is needed for a delta"""
+    (magic, version, kind, seed, frame, endless, layout, game_over, winner, paused,
+     ball_count, powerup_count, laser_count, brick_entries) = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a snapshot of this version")
+
+    game.frame = frame
+    game.game_over = bool(game_over)
+    game.winner = winner
+    game.paused = bool(paused)
+    game.endless = endless
+    # Endless layouts are generated from the seed, so a new seed needs the layout built again
+    if layout != game.current_layout or seed != game.seed:
+        game.seed = seed
+        game.load_layout(layout)
+
+    offset = HEADER.size
+    for player in game.players:
+        (player.score, player.lives, x, y, width, height, prev_x, laser_cooldown,
+         sticky, laser_active) = PLAYER.unpack_from(data, offset)
+        paddle = player.paddle
+        paddle.rect.update(x, y, width, height)
+        paddle.prev_x = prev_x
+        paddle.laser_cooldown = laser_cooldown
+        paddle.sticky = sticky
+        paddle.laser_active = laser_active
+        offset += PLAYER.size
+
+    rng = game.rng
+    rng_state = RNG.unpack_from(data, offset)
+    rng.setstate((3, rng_state[2:], rng_state[1] if rng_state[0] else None))
+    if isinstance(rng, TrackedRandom):
+        rng.packed = data[offset:offset + RNG.size]
+        rng.packed_at = rng.changes
+    offset += RNG.size
+
+    layout_bricks = game.brick_grid.layout
+    if kind == DELTA:
+        if base is None or full_layout(base) != (seed, layout):
+            raise ValueError("A delta snapshot needs the full snapshot it was taken against")
+        states = bytearray(base[BRICKS_OFFSET:BRICKS_OFFSET + len(layout_bricks)])
+        changed = array('H')
+        changed.frombytes(data[offset:offset + 2 * brick_entries])
+        offset += 2 * brick_entries
+        for i, state in zip(changed, data[offset:offset + brick_entries]):
+            states[i] = state
+        offset += brick_entries
+    else:
+        states = data[offset:offset + brick_entries]
+        offset += brick_entries
+    if len(states) != len(layout_bricks):
+        raise ValueError("Snapshot bricks do not match the layout")
+    restore_bricks(game, states)
+
+    paddles = [player.paddle for player in game.players]
+    balls = []
+    for values in BALL.iter_unpack(data[offset:offset + ball_count * BALL.size]):
+        x, y, prev_x, prev_y, velocity_x, velocity_y, attach_offset, attached, radius, speed = values
+        ball = Ball.__new__(Ball)  # Skips __init__, which draws a direction from the RNG
+        ball.pos = pygame.Vector2(x, y)
+        ball.prev = pygame.Vector2(prev_x, prev_y)
+        ball.velocity = pygame.Vector2(velocity_x, velocity_y)
+        ball.attach_offset = attach_offset
+        ball.attached_to = paddles[attached] if attached >= 0 else None
+        ball.radius = radius
+        ball.speed = speed
+        ball.color = WHITE
+        balls.append(ball)
+    offset += ball_count * BALL.size
+    game.balls[:] = balls
+
+    powerups = []
+    for x, y, prev_y, type_id in POWERUP.iter_unpack(data[offset:offset + powerup_count * POWERUP.size]):
+        powerup = PowerUp(x, y, type_id)
+        powerup.prev_y = prev_y
+        powerups.append(powerup)
+    offset += powerup_count * POWERUP.size
+    game.powerups[:] = powerups
+
+    lasers = []
+    for x, y, prev_y in LASER.iter_unpack(data[offset:offset + laser_count * LASER.size]):
+        laser = Laser(x, y)
+        laser.prev_y = prev_y
+        lasers.append(laser)
+    game.lasers[:] = lasers
+
+    # Everything on screen may have changed
+    game.hud_state = None
+    if game.brick_layer is not None:
+        game.brick_layer.build(game.bricks)
+        game.renderer.invalidate()
+
+def restore_bricks(game, states):
+    """Remove and bring back bricks so the layout matches the brick states"""
+    bricks = game.bricks
+    grid = game.brick_grid
+    alive = grid.order
+    for position, (brick, state) in enumerate(zip(grid.layout, states)):
+        if state == DEAD:
+            if brick in alive:
+                bricks.remove(brick)
+                grid.remove(brick)
+        else:
+            brick.hits = state
+            if brick not in alive:
+                bricks.append(brick)
+                grid.add(brick, position)
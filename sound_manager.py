@@ -1,53 +1,125 @@
 import pygame
 import os
+import threading
 
-class SoundManager:
+# Sound effects and music tracks by name
+SOUND_FILES = {
+    'paddle_hit': 'assets/sounds/beep.wav',
+    'brick_hit': 'assets/sounds/pop.wav',
+    'powerup': 'assets/sounds/powerup.wav',
+    'laser': 'assets/sounds/laser.wav',
+    'game_over': 'assets/sounds/game_over.wav',
+    'menu_select': 'assets/sounds/select.wav'
+}
+
+MUSIC_FILES = {
+    'menu': 'assets/music/menu_music.wav',
+    'gameplay': 'assets/music/gameplay_music.wav'
+}
+EMPTY_WAV_SIZE = 44  # Bytes of a placeholder WAV file, headers without samples
+
+# Mixing limits for queued sounds
+SOUND_PRIORITY = {
+    'game_over': 3,
+    'menu_select': 2,
+    'powerup': 2,
+    'laser': 1,
+    'paddle_hit': 1,
+    'brick_hit': 0
+}
+VOICE_LIMITS = {'brick_hit': 3}  # Voices of one sound playing at once
+DEFAULT_VOICE_LIMIT = 2
+CHANNEL_BUDGET = 6  # Voices of all sounds at once, out of pygame's 8 channels
+
+class SoundCache:
+    """
+    Process-wide cache of decoded sound effects.
+    Everything is loaded once, in a background thread started by warm_up()
+    or the first request. Requests made before loading finishes return
+    nothing and the sound is skipped, so the game never waits on file I/O.
+    Music is still streamed with pygame.mixer.music: a decoded track takes
+    tens of MB, while streaming only opens the file when the track changes.
+    """
     def __init__(self):
-        # Initialize sound dictionaries
         self.sounds = {}
-        self.music = {}
+        self.music = {}  # Track name -> path of the tracks that can be played
+        self.lock = threading.Lock()
+        self.loader = None
+        self.loaded = threading.Event()
+        self.current_music = None  # Track playing, or waiting for loading to finish
         
-        # Sound state
-        self.sound_on = True
-        self.music_on = True
-        
-        # Create placeholder sounds and music
-        self.create_placeholder_sounds()
-        self.load_sounds()
-        self.load_music()
+    def warm_up(self):
+        """Start loading in the background, does nothing if already started or the mixer is not initialized yet"""
+        with self.lock:
+            self.warm_up_locked()
+            
+    def warm_up_locked(self):
+        if self.loader is None and pygame.mixer.get_init():
+            self.loader = threading.Thread(target=self.load, name='sound-loader', daemon=True)
+            self.loader.start()
+                
+    def wait(self, timeout=None):
+        """Block until loading has finished, returns False on timeout or without a mixer"""
+        self.warm_up()
+        if self.loader is None:
+            return False
+        return self.loaded.wait(timeout)
         
+    def load(self):
+        """
+        Load everything, in the loader thread. Loading is marked finished
+        even if it fails part way, so wait() and the music never hang on it.
+        """
+        sounds = {}
+        music = {}
+        try:
+            self.create_placeholder_sounds()
+            
+            for sound_name, path in SOUND_FILES.items():
+                try:
+                    sound = pygame.mixer.Sound(path)
+                except Exception:
+                    print(f"Could not load sound: {path}")
+                    continue
+                # Empty placeholders are left out, SDL_mixer can crash playing an empty chunk on a channel
+                if sound.get_length() > 0:
+                    sounds[sound_name] = sound
+                    
+            # Placeholders are replaced by effects synthesized in memory (needs NumPy)
+            missing = [name for name in SOUND_FILES if name not in sounds]
+            if missing:
+                import synth  # Imported here so NumPy loads in this thread, not at startup
+                sounds.update(synth.load_sounds(missing))
+                
+            # Tracks are only checked here, pygame.mixer.music streams them when played
+            for music_name, path in MUSIC_FILES.items():
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    print(f"Could not load music: {path}")
+                    continue
+                if size > EMPTY_WAV_SIZE:
+                    music[music_name] = path
+        except Exception as e:
+            print(f"Could not load sounds: {e}")
+        finally:
+            with self.lock:
+                self.sounds = sounds
+                self.music = music
+                # Start the music that was requested while loading
+                if self.current_music is not None:
+                    self.start_music(self.current_music)
+                self.loaded.set()
+            
     def create_placeholder_sounds(self):
         """Create placeholder sound files if they don't exist"""
-        # Create directories if they don't exist
-        os.makedirs('assets/sounds', exist_ok=True)
-        os.makedirs('assets/music', exist_ok=True)
-        
-        # Define sound files to create
-        sound_files = {
-            'paddle_hit': 'beep.wav',
-            'brick_hit': 'pop.wav',
-            'powerup': 'powerup.wav',
-            'laser': 'laser.wav',
-            'game_over': 'game_over.wav',
-            'menu_select': 'select.wav'
-        }
-        
-        music_files = {
-            'menu': 'menu_music.wav',
-            'gameplay': 'gameplay_music.wav'
-        }
-        
-        # Create placeholder sound files if they don't exist
-        for sound_name, filename in sound_files.items():
-            path = os.path.join('assets/sounds', filename)
-            if not os.path.exists(path):
-                self.create_empty_sound_file(path)
-                
-        # Create placeholder music files if they don't exist
-        for music_name, filename in music_files.items():
-            path = os.path.join('assets/music', filename)
+        for path in list(SOUND_FILES.values()) + list(MUSIC_FILES.values()):
             if not os.path.exists(path):
-                self.create_empty_sound_file(path)
+                try:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    self.create_empty_sound_file(path)
+                except OSError as e:
+                    print(f"Could not create placeholder sound: {e}")
                 
     def create_empty_sound_file(self, path):
         """Create an empty sound file that won't cause errors"""
@@ -71,57 +143,158 @@ class SoundManager:
             # Data chunk
             f.write(b'data')
             f.write((0).to_bytes(4, byteorder='little'))  # Data size
-                
-    def load_sounds(self):
-        """Load all sound effects"""
-        sound_files = {
-            'paddle_hit': 'assets/sounds/beep.wav',
-            'brick_hit': 'assets/sounds/pop.wav',
-            'powerup': 'assets/sounds/powerup.wav',
-            'laser': 'assets/sounds/laser.wav',
-            'game_over': 'assets/sounds/game_over.wav',
-            'menu_select': 'assets/sounds/select.wav'
-        }
+            
+    def get_sound(self, sound_name):
+        """The decoded sound, or None while loading or if it could not be loaded"""
+        if not self.loaded.is_set():
+            self.warm_up()
+            return None
+        return self.sounds.get(sound_name)
         
-        for sound_name, path in sound_files.items():
+    def play_music(self, music_name):
+        """Loop a music track, it starts once loading has finished"""
+        with self.lock:
+            self.current_music = music_name
+            if self.loaded.is_set():
+                self.start_music(music_name)
+            else:
+                self.warm_up_locked()
+                
+    def start_music(self, music_name):
+        """
+        Stream a track, the lock must be held: the loader thread starts the
+        track requested while loading, and pygame.mixer.music must not be
+        used from two threads at once
+        """
+        path = self.music.get(music_name)
+        try:
+            if path is not None:
+                pygame.mixer.music.load(path)
+                pygame.mixer.music.play(-1)  # Loop indefinitely
+            else:
+                pygame.mixer.music.stop()
+        except Exception:
+            print(f"Could not play music: {path}")
+                
+    def stop_music(self):
+        with self.lock:
+            self.current_music = None
             try:
-                self.sounds[sound_name] = pygame.mixer.Sound(path)
-            except:
-                print(f"Could not load sound: {path}")
+                pygame.mixer.music.stop()
+            except Exception:
+                pass
                 
-    def load_music(self):
-        """Load all music tracks"""
-        music_files = {
-            'menu': 'assets/music/menu_music.wav',
-            'gameplay': 'assets/music/gameplay_music.wav'
-        }
+    def pause_music(self):
+        with self.lock:
+            try:
+                pygame.mixer.music.pause()
+            except Exception:
+                pass
+                
+    def unpause_music(self):
+        with self.lock:
+            try:
+                pygame.mixer.music.unpause()
+            except Exception:
+                pass
+                
+# Shared by every SoundManager
+sound_cache = SoundCache()
+
+class SoundManager:
+    """
+    Sound and music settings of one owner, e.g. the menus or a match.
+    Sounds come from the shared sound_cache, so creating a SoundManager
+    does no file I/O.
+    """
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else sound_cache
+        
+        # Sound state
+        self.sound_on = True
+        self.music_on = True
+        
+        # Sounds queued during a game update, name -> number of requests
+        self.queue = {}
+        self.queued = 0
+        self.merged = 0
+        self.dropped = 0
+        self.played = 0
+        
+        # Load sounds in the background if nobody has yet
+        self.cache.warm_up()
         
-        for music_name, path in music_files.items():
-            self.music[music_name] = path
-            
     def play_sound(self, sound_name):
         """Play a sound effect if sound is enabled"""
-        if self.sound_on and sound_name in self.sounds:
-            try:
-                self.sounds[sound_name].play()
-            except:
-                pass
+        if self.sound_on:
+            sound = self.cache.get_sound(sound_name)
+            if sound is not None:
+                sound.play()
+                
+    def queue_sound(self, sound_name):
+        """Request a sound for this frame, flush() plays it at most once"""
+        if self.sound_on:
+            self.queue[sound_name] = self.queue.get(sound_name, 0) + 1
+            
+    def flush(self):
+        """
+        Play the sounds queued since the last flush, highest priority first.
+        Repeats of a sound within the frame are merged into one play. A sound
+        is dropped if it already has its voice limit playing, or if the
+        channel budget is used up and no lower priority sound can be stopped
+        to make room.
+        """
+        if not self.queue:
+            return
+        queue = self.queue
+        self.queue = {}
+        
+        playing = {name: sound.get_num_channels() for name, sound in self.cache.sounds.items()}
+        busy = sum(playing.values())
+        for sound_name in sorted(queue, key=lambda name: -SOUND_PRIORITY.get(name, 0)):
+            self.queued += queue[sound_name]
+            self.merged += queue[sound_name] - 1
+            priority = SOUND_PRIORITY.get(sound_name, 0)
+            
+            sound = self.cache.get_sound(sound_name)
+            if sound is None or playing.get(sound_name, 0) >= VOICE_LIMITS.get(sound_name, DEFAULT_VOICE_LIMIT):
+                self.dropped += 1
+                continue
+                
+            if busy >= CHANNEL_BUDGET:
+                # Stop the lowest priority sound that is playing, if it ranks below this one
+                victims = [name for name, voices in playing.items()
+                           if voices and SOUND_PRIORITY.get(name, 0) < priority]
+                if not victims:
+                    self.dropped += 1
+                    continue
+                victim = min(victims, key=lambda name: SOUND_PRIORITY.get(name, 0))
+                self.cache.sounds[victim].stop()
+                busy -= playing[victim]
+                playing[victim] = 0
+                
+            sound.play()
+            playing[sound_name] = playing.get(sound_name, 0) + 1
+            busy += 1
+            self.played += 1
             
+    def stats(self):
+        """Counters of queued sound requests"""
+        return {
+            'queued': self.queued,
+            'merged': self.merged,
+            'dropped': self.dropped,
+            'played': self.played,
+        }
+        
     def play_music(self, music_name):
         """Play a music track if music is enabled"""
-        if self.music_on and music_name in self.music:
-            try:
-                pygame.mixer.music.load(self.music[music_name])
-                pygame.mixer.music.play(-1)  # Loop indefinitely
-            except:
-                print(f"Could not play music: {self.music[music_name]}")
-                
+        if self.music_on:
+            self.cache.play_music(music_name)
+            
     def stop_music(self):
         """Stop currently playing music"""
-        try:
-            pygame.mixer.music.stop()
-        except:
-            pass
+        self.cache.stop_music()
         
     def toggle_sound(self):
         """Toggle sound effects on/off"""
@@ -132,13 +305,37 @@ class SoundManager:
         """Toggle music on/off"""
         self.music_on = not self.music_on
         if self.music_on:
-            try:
-                pygame.mixer.music.unpause()
-            except:
-                pass
+            self.cache.unpause_music()
         else:
-            try:
-                pygame.mixer.music.pause()
-            except:
-                pass
+            self.cache.pause_music()
+        return self.music_on
+
+class NullSoundManager:
+    """Silent stand-in for SoundManager used by the headless engine"""
+    def __init__(self):
+        self.sound_on = False
+        self.music_on = False
+        
+    def play_sound(self, sound_name):
+        pass
+        
+    def queue_sound(self, sound_name):
+        pass
+        
+    def flush(self):
+        pass
+        
+    def stats(self):
+        return {'queued': 0, 'merged': 0, 'dropped': 0, 'played': 0}
+        
+    def play_music(self, music_name):
+        pass
+        
+    def stop_music(self):
+        pass
+        
+    def toggle_sound(self):
+        return self.sound_on
+        
+    def toggle_music(self):
         return self.music_on
@@ -0,0 +1,77 @@
+import math
+
+# Cell size matches the 60x20 bricks used by create_layout
+CELL_WIDTH = 60
+CELL_HEIGHT = 20
+
+class BrickGrid:
+    """
+    Uniform grid over the brick field.
+    Each brick is stored in every cell its rect touches (edges included),
+    so a query only has to look at the few bricks near the ball or laser.
+    """
+    def __init__(self, cell_width=CELL_WIDTH, cell_height=CELL_HEIGHT):
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.cells = {}
+        self.order = {}
+        self.layout = ()  # Every brick of the layout in its original order, destroyed ones included
+
+    def build(self, bricks):
+        """Index a freshly created layout, remembering each brick's position in the list"""
+        self.cells = {}
+        self.order = {}
+        self.layout = tuple(bricks)
+        for i, brick in enumerate(self.layout):
+            self.add(brick, i)
+
+    def add(self, brick, position):
+        """Index a brick at its position in the layout, e.g. when a snapshot brings it back"""
+        self.order[brick] = position
+        for key in self.cell_keys(brick.rect.left, brick.rect.top, brick.rect.right, brick.rect.bottom):
+            self.cells.setdefault(key, []).append(brick)
+
+    def remove(self, brick):
+        """Remove a destroyed brick from the grid"""
+        if brick not in self.order:
+            return
+        del self.order[brick]
+        for key in self.cell_keys(brick.rect.left, brick.rect.top, brick.rect.right, brick.rect.bottom):
+            cell = self.cells[key]
+            cell.remove(brick)
+            if not cell:
+                del self.cells[key]
+
+    def cell_keys(self, left, top, right, bottom):
+        """All cells touched by the area, edges included"""
+        col_start = math.floor(left / self.cell_width)
+        col_end = math.floor(right / self.cell_width)
+        row_start = math.floor(top / self.cell_height)
+        row_end = math.floor(bottom / self.cell_height)
+        for col in range(col_start, col_end + 1):
+            for row in range(row_start, row_end + 1):
+                yield (col, row)
+
+    def query(self, left, top, right, bottom):
+        """
+        Return the bricks that may touch the area, in the same order as the
+        brick list, so the first hit matches a linear scan over the list
+        """
+        cells = self.cells
+        found = set()
+        for key in self.cell_keys(left, top, right, bottom):
+            cell = cells.get(key)
+            if cell:
+                found.update(cell)
+        if len(found) > 1:
+            return sorted(found, key=self.order.__getitem__)
+        return list(found)
+
+    def query_circle(self, x, y, radius):
+        return self.query(x - radius, y - radius, x + radius, y + radius)
+
+    def query_rect(self, rect):
+        return self.query(rect.left, rect.top, rect.right, rect.bottom)
+
+    def __len__(self):
+        return len(self.order)
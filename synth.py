@@ -0,0 +1,151 @@
+import hashlib
+import mmap
+import os
+import struct
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Sound effects built from notes, used when an asset file is missing or an empty placeholder.
+# A note is (waveform, start frequency, end frequency, seconds, volume), notes play one after another.
+RECIPES = {
+    'paddle_hit': (('square', 440, 440, 0.06, 0.35),),
+    'brick_hit': (('triangle', 900, 600, 0.05, 0.5),),
+    'powerup': (('sine', 523, 523, 0.07, 0.4), ('sine', 659, 659, 0.07, 0.4), ('sine', 784, 1046, 0.12, 0.4)),
+    'laser': (('saw', 1600, 300, 0.15, 0.25),),
+    'game_over': (('square', 392, 392, 0.25, 0.3), ('square', 330, 330, 0.25, 0.3), ('square', 262, 196, 0.5, 0.3)),
+    'menu_select': (('sine', 660, 660, 0.04, 0.4), ('sine', 990, 990, 0.06, 0.4)),
+}
+
+SYNTH_VERSION = 1  # Bump when synthesize() changes so cached buffers are regenerated
+CACHE_PATH = 'assets/sounds/synth_cache.bin'
+
+# Cache file: header, one index entry per buffer, then the buffers
+MAGIC = b'BBSC'
+HEADER = struct.Struct('<4sI')  # Magic, entry count
+ENTRY = struct.Struct('<32sQQ')  # SHA-256 of the recipe and mixer format, offset, length
+ATTACK = 0.005  # Seconds of fade in at the start of each note
+
+def synthesize(recipe, sample_rate):
+    """Render a recipe to mono float samples in [-1, 1]"""
+    notes = []
+    for waveform, start_freq, end_freq, seconds, volume in recipe:
+        n = int(sample_rate * seconds)
+        t = np.arange(n) / sample_rate
+        # Linear frequency sweep, the phase is the integral of the frequency
+        freq = np.linspace(start_freq, end_freq, n)
+        phase = np.cumsum(freq) / sample_rate
+        cycle = phase % 1.0
+        if waveform == 'sine':
+            wave = np.sin(2 * np.pi * phase)
+        elif waveform == 'square':
+            wave = np.where(cycle < 0.5, 1.0, -1.0)
+        elif waveform == 'triangle':
+            wave = 4 * np.abs(cycle - 0.5) - 1
+        elif waveform == 'saw':
+            wave = 2 * cycle - 1
+        else:
+            raise ValueError(f"Unknown waveform: {waveform}")
+
+        # Short attack then a linear decay to silence, so notes do not click
+        envelope = np.minimum(1.0, t / ATTACK) * (1 - t / seconds)
+        notes.append(wave * envelope * volume)
+    return np.concatenate(notes)
+
+def to_pcm(samples, channels):
+    """Float samples to interleaved signed 16-bit PCM bytes"""
+    pcm = (np.clip(samples, -1, 1) * 32767).astype('<i2')
+    return np.repeat(pcm, channels).tobytes()
+
+def recipe_key(recipe, sample_rate, channels):
+    return hashlib.sha256(repr((SYNTH_VERSION, recipe, sample_rate, channels)).encode()).digest()
+
+class SynthCache:
+    """
+    Content-addressed file of generated PCM buffers.
+    Each buffer is stored under the hash of its recipe and mixer format, so a
+    changed recipe or output format simply misses. The whole file is read
+    with a single mmap.
+    """
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.buffers = {}  # Key -> PCM bytes
+        self.dirty = False
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                magic, count = HEADER.unpack_from(data, 0)
+                if magic != MAGIC:
+                    return
+                for i in range(count):
+                    key, offset, length = ENTRY.unpack_from(data, HEADER.size + i * ENTRY.size)
+                    self.buffers[key] = data[offset:offset + length]
+        except (OSError, ValueError, struct.error):
+            # Missing, empty or damaged cache, everything is generated again
+            self.buffers = {}
+
+    def get(self, key):
+        return self.buffers.get(key)
+
+    def put(self, key, buffer):
+        self.buffers[key] = buffer
+        self.dirty = True
+
+    def save(self, keys):
+        """Write the given entries, dropping any others, if something was added"""
+        if not self.dirty:
+            return
+        keys = [key for key in keys if key in self.buffers]
+        offset = HEADER.size + len(keys) * ENTRY.size
+        index = []
+        for key in keys:
+            index.append(ENTRY.pack(key, offset, len(self.buffers[key])))
+            offset += len(self.buffers[key])
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, len(keys)))
+            f.write(b''.join(index))
+            for key in keys:
+                f.write(self.buffers[key])
+        os.replace(temp_path, self.path)
+        self.dirty = False
+
+def load_sounds(names, path=CACHE_PATH):
+    """
+    Build pygame Sounds for the named effects from memory buffers.
+    Buffers come from the cache file when possible and are generated and
+    cached otherwise. Returns {} without NumPy or a 16-bit signed mixer.
+    """
+    init = pygame.mixer.get_init()
+    if np is None or init is None:
+        return {}
+    sample_rate, size, channels = init
+    if size != -16:
+        return {}
+
+    cache = SynthCache(path)
+    cache.load()
+    sounds = {}
+    keys = []
+    for name in names:
+        if name not in RECIPES:
+            continue
+        key = recipe_key(RECIPES[name], sample_rate, channels)
+        keys.append(key)
+        buffer = cache.get(key)
+        if buffer is None:
+            buffer = to_pcm(synthesize(RECIPES[name], sample_rate), channels)
+            cache.put(key, buffer)
+        sounds[name] = pygame.mixer.Sound(buffer=buffer)
+
+    try:
+        cache.save(keys)
+    except OSError:
+        pass  # Read-only install, generate again next time
+    return sounds
@@ -0,0 +1,106 @@
+import time
+from collections import deque
+
+class FixedTimestep:
+    """
+    Fixed-timestep accumulator.
+    Real time is added to the accumulator every rendered frame, and the
+    simulation runs one tick for every full tick interval in it, so the game
+    plays at the same speed whatever the render rate. The remainder gives
+    alpha, how far rendering is between the last two ticks.
+    """
+    def __init__(self, tick_rate=60, max_ticks=5):
+        self.tick_rate = tick_rate
+        self.tick_time = 1 / tick_rate
+        self.max_ticks = max_ticks  # Catch-up limit per frame, older time is dropped
+        self.accumulator = 0.0
+        self.last = None
+
+        # Statistics
+        self.frames = 0
+        self.ticks = 0
+        self.idle_frames = 0  # Frames that ran no tick
+        self.catch_up_frames = 0  # Frames that ran more than one tick
+        self.dropped_ticks = 0  # Ticks skipped because the frame was too late
+        self.max_ticks_per_frame = 0
+
+    def reset(self):
+        """Start timing again, e.g. when gameplay resumes after a menu"""
+        self.accumulator = 0.0
+        self.last = None
+
+    def advance(self, now=None):
+        """Add the real time since the last frame, returns the number of ticks to run"""
+        now = time.perf_counter() if now is None else now
+        elapsed = self.tick_time if self.last is None else now - self.last
+        self.last = now
+        self.accumulator += elapsed
+
+        ticks = int(self.accumulator / self.tick_time)
+        self.accumulator -= ticks * self.tick_time
+        if ticks > self.max_ticks:
+            # Too far behind to catch up, slow the game down instead of spiralling
+            self.dropped_ticks += ticks - self.max_ticks
+            ticks = self.max_ticks
+
+        self.frames += 1
+        self.ticks += ticks
+        if ticks == 0:
+            self.idle_frames += 1
+        elif ticks > 1:
+            self.catch_up_frames += 1
+        self.max_ticks_per_frame = max(self.max_ticks_per_frame, ticks)
+        return ticks
+
+    @property
+    def alpha(self):
+        """Fraction of a tick between the last simulated state and now"""
+        return min(1.0, self.accumulator / self.tick_time)
+
+    def stats(self):
+        return {
+            'tick_rate': self.tick_rate,
+            'frames': self.frames,
+            'ticks': self.ticks,
+            'idle_frames': self.idle_frames,
+            'catch_up_frames': self.catch_up_frames,
+            'dropped_ticks': self.dropped_ticks,
+            'max_ticks_per_frame': self.max_ticks_per_frame,
+        }
+
+class RenderRate:
+    """
+    Render frame rate that steps down under load.
+    When the work per frame stays above most of the frame budget, the next
+    lower rate is used. It steps back up once frames are comfortably within
+    the budget of the higher rate. Only rendering slows down, the simulation
+    keeps its fixed tick rate.
+    """
+    def __init__(self, levels=(60,), adaptive=False, window=30):
+        self.levels = sorted(levels, reverse=True)
+        self.level = 0
+        self.adaptive = adaptive
+        self.frame_times = deque(maxlen=window)
+        self.changes = 0
+
+    @property
+    def fps(self):
+        return self.levels[self.level]
+
+    def record(self, frame_time):
+        """Report the seconds spent on a frame, not counting the wait for the next one"""
+        if not self.adaptive:
+            return
+        self.frame_times.append(frame_time)
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return
+
+        average = sum(self.frame_times) / len(self.frame_times)
+        if average > 0.9 / self.fps and self.level < len(self.levels) - 1:
+            self.level += 1
+        elif self.level > 0 and average < 0.5 / self.levels[self.level - 1]:
+            self.level -= 1
+        else:
+            return
+        self.changes += 1
+        self.frame_times.clear()
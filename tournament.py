@@ -0,0 +1,153 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from game_manager import GameManager
+
+# Constants
+SCREEN_WIDTH = 800
+FPS = 60
+
+# Scripted paddle controllers.
+# Each one takes (game, player, rng) and returns the player's (left, right, action) input.
+
+def idle_controller(game, player, rng):
+    """Launches the ball and never moves"""
+    return (False, False, True)
+
+def random_controller(game, player, rng):
+    """Mashes random keys"""
+    return (rng.random() < 0.5, rng.random() < 0.5, rng.random() < 0.1)
+
+def tracker_controller(game, player, rng):
+    """Follows the lowest ball in its half and fires whenever it can"""
+    paddle = player.paddle
+    in_half = player.screen_half == 'left'
+    target = None
+    for ball in game.balls:
+        if (ball.pos.x < SCREEN_WIDTH//2) == in_half and (target is None or ball.pos.y > target.pos.y):
+            target = ball
+    if target is None:
+        return (False, False, True)
+    return (target.pos.x < paddle.rect.centerx - 10, target.pos.x > paddle.rect.centerx + 10, True)
+
+def lazy_tracker_controller(game, player, rng):
+    """Tracker that only reacts once a ball is falling in the lower half of the screen"""
+    left, right, action = tracker_controller(game, player, rng)
+    falling = any(
+        ball.velocity.y > 0 and ball.pos.y > 300 and (ball.pos.x < SCREEN_WIDTH//2) == (player.screen_half == 'left')
+        for ball in game.balls
+    )
+    if not falling:
+        return (False, False, action)
+    return (left, right, action)
+
+CONTROLLERS = {
+    'idle': idle_controller,
+    'random': random_controller,
+    'tracker': tracker_controller,
+    'lazy_tracker': lazy_tracker_controller,
+}
+
+def run_match(match_id, controller1, controller2, seed, max_frames):
+    """
+    Play one headless match and return a compact result dict.
+    Runs in a worker process, so only names and numbers cross the process boundary.
+    """
+    start = time.perf_counter()
+    game = GameManager(headless=True, seed=seed)
+    controllers = (CONTROLLERS[controller1], CONTROLLERS[controller2])
+    rngs = (random.Random(seed * 2 + 1), random.Random(seed * 2 + 2))
+
+    frames = 0
+    while not game.game_over and frames < max_frames:
+        inputs = tuple(
+            controller(game, player, rng)
+            for controller, player, rng in zip(controllers, game.players, rngs)
+        )
+        frames += game.step(inputs)
+
+    scores = [player.score for player in game.players]
+    if game.game_over:
+        winner = game.winner
+    elif scores[0] != scores[1]:
+        # Out of time, decide by score
+        winner = 1 if scores[0] > scores[1] else 2
+    else:
+        winner = 0
+
+    return {
+        'match': match_id,
+        'players': [controller1, controller2],
+        'seed': seed,
+        'scores': scores,
+        'lives': [player.lives for player in game.players],
+        'winner': winner,
+        'frames': frames,
+        'finished': game.game_over,
+        'seconds': round(time.perf_counter() - start, 4),
+    }
+
+def schedule(controllers, games_per_pair, seed):
+    """Round-robin schedule, every controller plays every other one on both sides"""
+    rng = random.Random(seed)
+    jobs = []
+    for controller1, controller2 in itertools.permutations(controllers, 2):
+        for _ in range(games_per_pair):
+            jobs.append((len(jobs), controller1, controller2, rng.randrange(2**32)))
+    return jobs
+
+def run_tournament(controllers, games_per_pair=4, out_path='tournament.jsonl', workers=None,
+                   max_frames=10 * 60 * FPS, seed=0):
+    """
+    Run a round-robin tournament on a process pool with one worker per core.
+    Results are appended to out_path as JSON lines as soon as each match finishes.
+    Returns the standings as {controller: [wins, losses, draws]}.
+    """
+    for name in controllers:
+        if name not in CONTROLLERS:
+            raise ValueError(f"Unknown controller: {name}")
+
+    jobs = schedule(controllers, games_per_pair, seed)
+    standings = {name: [0, 0, 0] for name in controllers}
+
+    with open(out_path, 'w') as out, ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(run_match, *job, max_frames) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+
+            controller1, controller2 = result['players']
+            if result['winner'] == 0:
+                standings[controller1][2] += 1
+                standings[controller2][2] += 1
+            else:
+                winner = result['players'][result['winner'] - 1]
+                loser = controller2 if winner == controller1 else controller1
+                standings[winner][0] += 1
+                standings[loser][1] += 1
+
+    return standings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Round-robin tournament between scripted paddle controllers")
+    parser.add_argument('controllers', nargs='*', default=list(CONTROLLERS), help="controllers to enter")
+    parser.add_argument('--games', type=int, default=4, help="games per ordered pair of controllers")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument('--out', default='tournament.jsonl', help="JSONL file for match results")
+    parser.add_argument('--max-frames', type=int, default=10 * 60 * FPS, help="frame limit per match")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the match schedule")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    standings = run_tournament(args.controllers, args.games, args.out, args.workers, args.max_frames, args.seed)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'Controller':<16}{'W':>6}{'L':>6}{'D':>6}")
+    for name, (wins, losses, draws) in sorted(standings.items(), key=lambda item: -item[1][0]):
+        print(f"{name:<16}{wins:>6}{losses:>6}{draws:>6}")
+    print(f"Finished in {elapsed:.1f}s")
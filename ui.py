@@ -1,4 +1,5 @@
 import pygame
+from collections import OrderedDict
 from pygame.locals import *
 
 # Constants
@@ -11,6 +12,41 @@ RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 YELLOW = (255, 255, 0)
 
+class TextCache:
+    """
+    LRU cache of rendered text surfaces keyed by (font, text, color, antialias).
+    Text is only rendered again when it actually changes, e.g. a new score.
+    """
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        
+    def render(self, font, text, antialias, color):
+        """Same arguments as font.render, returns a cached surface when possible"""
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+            
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+        
+    def clear(self):
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+        
+# Shared by all ui.py rendering
+text_cache = TextCache()
+
 class Button:
     def __init__(self, x, y, width, height, text, color=BLUE, hover_color=GREEN, text_color=WHITE):
         self.rect = pygame.Rect(x, y, width, height)
@@ -19,6 +55,7 @@ class Button:
         self.hover_color = hover_color
         self.text_color = text_color
         self.is_hovered = False
+        self.dirty = True  # Needs to be drawn again
         
     def draw(self, screen, font):
         # Draw button with hover effect
@@ -27,154 +64,198 @@ class Button:
         pygame.draw.rect(screen, WHITE, self.rect, 2)  # Border
         
         # Draw text
-        text_surf = font.render(self.text, True, self.text_color)
+        text_surf = text_cache.render(font, self.text, True, self.text_color)
         text_rect = text_surf.get_rect(center=self.rect.center)
         screen.blit(text_surf, text_rect)
+        self.dirty = False
         
+    def set_text(self, text):
+        if text != self.text:
+            self.text = text
+            self.dirty = True
+            
     def check_hover(self, mouse_pos):
-        self.is_hovered = self.rect.collidepoint(mouse_pos)
+        is_hovered = bool(self.rect.collidepoint(mouse_pos))
+        if is_hovered != self.is_hovered:
+            self.is_hovered = is_hovered
+            self.dirty = True
         return self.is_hovered
         
     def is_clicked(self, mouse_pos, mouse_click):
         return self.rect.collidepoint(mouse_pos) and mouse_click
         
 class Menu:
-    def __init__(self, screen, font, large_font):
+    """
+    Retained menu screens.
+    Buttons are built once per screen and the static parts of each screen are
+    composited once into a background surface. Drawing a screen that is
+    already showing only redraws buttons whose hover state or text changed.
+    """
+    def __init__(self, screen, font, large_font, renderer=None):
         self.screen = screen
         self.font = font
         self.large_font = large_font
-        
-    def draw_main_menu(self, mouse_pos):
-        self.screen.fill(BLACK)
-        
-        # Title
-        title = self.large_font.render("BRICK BREAKER", True, WHITE)
-        title_rect = title.get_rect(center=(SCREEN_WIDTH//2, 100))
-        self.screen.blit(title, title_rect)
-        
-        # Subtitle
-        subtitle = self.font.render("Multiplayer Edition", True, YELLOW)
-        subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH//2, 150))
-        self.screen.blit(subtitle, subtitle_rect)
-        
-        # Buttons
-        start_button = Button(SCREEN_WIDTH//2 - 100, 250, 200, 50, "Start Game")
-        settings_button = Button(SCREEN_WIDTH//2 - 100, 320, 200, 50, "Settings")
-        quit_button = Button(SCREEN_WIDTH//2 - 100, 390, 200, 50, "Quit")
-        
-        # Check hover states
-        start_button.check_hover(mouse_pos)
-        settings_button.check_hover(mouse_pos)
-        quit_button.check_hover(mouse_pos)
-        
-        # Draw buttons
-        start_button.draw(self.screen, self.font)
-        settings_button.draw(self.screen, self.font)
-        quit_button.draw(self.screen, self.font)
-        
-        # Instructions
-        instructions = [
-            "Player 1: A/D to move, W to launch ball/fire laser",
-            "Player 2: Left/Right arrows to move, Up to launch ball/fire laser",
-            "Collect power-ups to gain advantages!"
-        ]
-        
-        for i, line in enumerate(instructions):
-            text = self.font.render(line, True, WHITE)
-            self.screen.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, 480 + i*30))
+        self.renderer = renderer
+        
+        self.main_buttons = (
+            Button(SCREEN_WIDTH//2 - 100, 250, 200, 50, "Start Game"),
+            Button(SCREEN_WIDTH//2 - 100, 320, 200, 50, "Settings"),
+            Button(SCREEN_WIDTH//2 - 100, 390, 200, 50, "Quit"),
+        )
+        self.settings_buttons = (
+            Button(SCREEN_WIDTH//2 - 100, 200, 200, 50, "Sound: ON"),
+            Button(SCREEN_WIDTH//2 - 100, 270, 200, 50, "Music: ON"),
+            Button(SCREEN_WIDTH//2 - 100, 400, 200, 50, "Back"),
+        )
+        self.game_over_buttons = (
+            Button(SCREEN_WIDTH//2 - 100, 300, 200, 50, "Play Again"),
+            Button(SCREEN_WIDTH//2 - 100, 370, 200, 50, "Main Menu"),
+            Button(SCREEN_WIDTH//2 - 100, 440, 200, 50, "Quit"),
+        )
+        self.pause_buttons = (
+            Button(SCREEN_WIDTH//2 - 100, 300, 200, 50, "Resume"),
+            Button(SCREEN_WIDTH//2 - 100, 370, 200, 50, "Main Menu"),
+        )
+        
+        self.backgrounds = {}  # Screen name -> (content key, surface)
+        self.pause_overlay = None
+        self.current = None  # (screen name, content key) currently on display
+        self.buttons = ()  # Buttons of the current screen
+        
+    def invalidate(self):
+        """Force the next draw call to repaint its whole screen"""
+        self.current = None
+        
+    def handle_mouse_motion(self, mouse_pos):
+        """Update hover states of the buttons on the current screen"""
+        for button in self.buttons:
+            button.check_hover(mouse_pos)
             
-        return start_button, settings_button, quit_button
+    def new_surface(self, alpha=False):
+        if alpha:
+            return pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        return surface
+        
+    def show_screen(self, name, key, build_background, buttons, mouse_pos):
+        """
+        Show a screen, repainting everything only when the screen or its content changed.
+        build_background draws the static part of the screen onto a surface, the
+        background is kept until key changes. Without it the screen is drawn over
+        whatever is already on the display.
+        """
+        if self.current != (name, key):
+            if build_background is not None:
+                cached = self.backgrounds.get(name)
+                if cached is None or cached[0] != key:
+                    background = self.new_surface()
+                    background.fill(BLACK)
+                    build_background(background)
+                    self.backgrounds[name] = (key, background)
+                self.screen.blit(self.backgrounds[name][1], (0, 0))
+                
+            self.current = (name, key)
+            self.buttons = buttons
+            self.handle_mouse_motion(mouse_pos)
+            for button in buttons:
+                button.draw(self.screen, self.font)
+            if self.renderer is not None:
+                self.renderer.invalidate()
+            return
+            
+        for button in buttons:
+            if button.dirty:
+                button.draw(self.screen, self.font)
+                if self.renderer is not None:
+                    self.renderer.add(button.rect)
+                    
+    def draw_main_menu(self, mouse_pos, high_scores=()):
+        def build_background(surface):
+            # Title
+            title = text_cache.render(self.large_font, "BRICK BREAKER", True, WHITE)
+            title_rect = title.get_rect(center=(SCREEN_WIDTH//2, 100))
+            surface.blit(title, title_rect)
+            
+            # Subtitle
+            subtitle = text_cache.render(self.font, "Multiplayer Edition", True, YELLOW)
+            subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH//2, 150))
+            surface.blit(subtitle, subtitle_rect)
+            
+            # Instructions
+            instructions = [
+                "Player 1: A/D to move, W to launch ball/fire laser",
+                "Player 2: Left/Right arrows to move, Up to launch ball/fire laser",
+                "Collect power-ups to gain advantages!"
+            ]
+            
+            for i, line in enumerate(instructions):
+                text = text_cache.render(self.font, line, True, WHITE)
+                surface.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, 480 + i*30))
+                
+            # High scores
+            if high_scores:
+                self.draw_high_scores(high_scores, surface)
+                
+        self.show_screen('main', tuple(high_scores), build_background, self.main_buttons, mouse_pos)
+        return self.main_buttons
         
     def draw_settings_menu(self, mouse_pos, sound_on, music_on):
-        self.screen.fill(BLACK)
-        
-        # Title
-        title = self.large_font.render("SETTINGS", True, WHITE)
-        title_rect = title.get_rect(center=(SCREEN_WIDTH//2, 100))
-        self.screen.blit(title, title_rect)
-        
-        # Sound toggle button
-        sound_text = "Sound: ON" if sound_on else "Sound: OFF"
-        sound_button = Button(SCREEN_WIDTH//2 - 100, 200, 200, 50, sound_text)
-        
-        # Music toggle button
-        music_text = "Music: ON" if music_on else "Music: OFF"
-        music_button = Button(SCREEN_WIDTH//2 - 100, 270, 200, 50, music_text)
-        
-        # Back button
-        back_button = Button(SCREEN_WIDTH//2 - 100, 400, 200, 50, "Back")
-        
-        # Check hover states
-        sound_button.check_hover(mouse_pos)
-        music_button.check_hover(mouse_pos)
-        back_button.check_hover(mouse_pos)
-        
-        # Draw buttons
-        sound_button.draw(self.screen, self.font)
-        music_button.draw(self.screen, self.font)
-        back_button.draw(self.screen, self.font)
+        def build_background(surface):
+            # Title
+            title = text_cache.render(self.large_font, "SETTINGS", True, WHITE)
+            title_rect = title.get_rect(center=(SCREEN_WIDTH//2, 100))
+            surface.blit(title, title_rect)
+            
+        sound_button, music_button, back_button = self.settings_buttons
+        sound_button.set_text("Sound: ON" if sound_on else "Sound: OFF")
+        music_button.set_text("Music: ON" if music_on else "Music: OFF")
         
-        return sound_button, music_button, back_button
+        self.show_screen('settings', None, build_background, self.settings_buttons, mouse_pos)
+        return self.settings_buttons
         
     def draw_game_over(self, mouse_pos, winner, scores):
-        self.screen.fill(BLACK)
-        
-        # Title
-        title = self.large_font.render("GAME OVER", True, WHITE)
-        title_rect = title.get_rect(center=(SCREEN_WIDTH//2, 100))
-        self.screen.blit(title, title_rect)
-        
-        # Winner
-        winner_text = self.font.render(f"Player {winner} Wins!", True, YELLOW)
-        winner_rect = winner_text.get_rect(center=(SCREEN_WIDTH//2, 170))
-        self.screen.blit(winner_text, winner_rect)
-        
-        # Scores
-        score_text = self.font.render(f"Player 1: {scores[0]}  |  Player 2: {scores[1]}", True, WHITE)
-        score_rect = score_text.get_rect(center=(SCREEN_WIDTH//2, 220))
-        self.screen.blit(score_text, score_rect)
-        
-        # Buttons
-        play_again_button = Button(SCREEN_WIDTH//2 - 100, 300, 200, 50, "Play Again")
-        main_menu_button = Button(SCREEN_WIDTH//2 - 100, 370, 200, 50, "Main Menu")
-        quit_button = Button(SCREEN_WIDTH//2 - 100, 440, 200, 50, "Quit")
-        
-        # Check hover states
-        play_again_button.check_hover(mouse_pos)
-        main_menu_button.check_hover(mouse_pos)
-        quit_button.check_hover(mouse_pos)
-        
-        # Draw buttons
-        play_again_button.draw(self.screen, self.font)
-        main_menu_button.draw(self.screen, self.font)
-        quit_button.draw(self.screen, self.font)
-        
-        return play_again_button, main_menu_button, quit_button
+        def build_background(surface):
+            # Title
+            title = text_cache.render(self.large_font, "GAME OVER", True, WHITE)
+            title_rect = title.get_rect(center=(SCREEN_WIDTH//2, 100))
+            surface.blit(title, title_rect)
+            
+            # Winner
+            winner_text = text_cache.render(self.font, f"Player {winner} Wins!", True, YELLOW)
+            winner_rect = winner_text.get_rect(center=(SCREEN_WIDTH//2, 170))
+            surface.blit(winner_text, winner_rect)
+            
+            # Scores
+            score_text = text_cache.render(self.font, f"Player 1: {scores[0]}  |  Player 2: {scores[1]}", True, WHITE)
+            score_rect = score_text.get_rect(center=(SCREEN_WIDTH//2, 220))
+            surface.blit(score_text, score_rect)
+            
+        self.show_screen('game_over', (winner, tuple(scores)), build_background, self.game_over_buttons, mouse_pos)
+        return self.game_over_buttons
         
     def draw_pause_menu(self, mouse_pos):
-        # Semi-transparent overlay
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 128))
-        self.screen.blit(overlay, (0, 0))
-        
-        # Pause text
-        pause_text = self.large_font.render("PAUSED", True, WHITE)
-        pause_rect = pause_text.get_rect(center=(SCREEN_WIDTH//2, 200))
-        self.screen.blit(pause_text, pause_rect)
-        
-        # Buttons
-        resume_button = Button(SCREEN_WIDTH//2 - 100, 300, 200, 50, "Resume")
-        main_menu_button = Button(SCREEN_WIDTH//2 - 100, 370, 200, 50, "Main Menu")
-        
-        # Check hover states
-        resume_button.check_hover(mouse_pos)
-        main_menu_button.check_hover(mouse_pos)
-        
-        # Draw buttons
-        resume_button.draw(self.screen, self.font)
-        main_menu_button.draw(self.screen, self.font)
-        
-        return resume_button, main_menu_button
+        """
+        Draw the pause menu over the current game frame.
+        The overlay is built once and drawn when the menu opens, later calls
+        only redraw changed buttons.
+        """
+        if self.pause_overlay is None:
+            # Semi-transparent overlay
+            self.pause_overlay = self.new_surface(alpha=True)
+            self.pause_overlay.fill((0, 0, 0, 128))
+            
+        if self.current != ('pause', None):
+            self.screen.blit(self.pause_overlay, (0, 0))
+            
+            # Pause text
+            pause_text = text_cache.render(self.large_font, "PAUSED", True, WHITE)
+            pause_rect = pause_text.get_rect(center=(SCREEN_WIDTH//2, 200))
+            self.screen.blit(pause_text, pause_rect)
+            
+        self.show_screen('pause', None, None, self.pause_buttons, mouse_pos)
+        return self.pause_buttons
         
     def draw_game_ui(self, players, split_screen=True):
         # Draw divider for split screen
@@ -182,7 +263,7 @@ class Menu:
             pygame.draw.line(self.screen, WHITE, (SCREEN_WIDTH//2, 0), (SCREEN_WIDTH//2, SCREEN_HEIGHT), 2)
             
         # Player 1 info
-        p1_text = self.font.render(f"P1: {players[0].score}", True, WHITE)
+        p1_text = text_cache.render(self.font, f"P1: {players[0].score}", True, WHITE)
         self.screen.blit(p1_text, (20, 10))
         
         # Player 1 lives
@@ -190,19 +271,21 @@ class Menu:
             pygame.draw.circle(self.screen, WHITE, (20 + i*20, 40), 8)
             
         # Player 2 info
-        p2_text = self.font.render(f"P2: {players[1].score}", True, WHITE)
+        p2_text = text_cache.render(self.font, f"P2: {players[1].score}", True, WHITE)
         self.screen.blit(p2_text, (SCREEN_WIDTH - 120, 10))
         
         # Player 2 lives
         for i in range(players[1].lives):
             pygame.draw.circle(self.screen, WHITE, (SCREEN_WIDTH - 20 - i*20, 40), 8)
             
-    def draw_high_scores(self, high_scores):
-        """Draw high scores section on the screen"""
+    def draw_high_scores(self, high_scores, surface=None):
+        """Draw high scores section on the screen, or on the given surface"""
+        surface = surface if surface is not None else self.screen
+        
         # Draw high scores section
-        title = self.font.render("HIGH SCORES", True, YELLOW)
-        self.screen.blit(title, (SCREEN_WIDTH - 200, 50))
+        title = text_cache.render(self.font, "HIGH SCORES", True, YELLOW)
+        surface.blit(title, (SCREEN_WIDTH - 200, 50))
         
         for i, score in enumerate(high_scores):
-            score_text = self.font.render(f"{i+1}. {score}", True, WHITE)
-            self.screen.blit(score_text, (SCREEN_WIDTH - 200, 90 + i*30))
+            score_text = text_cache.render(self.font, f"{i+1}. {score}", True, WHITE)
+            surface.blit(score_text, (SCREEN_WIDTH - 200, 90 + i*30))